@@ -2,6 +2,9 @@ from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 import pandas as pd
 
+from modules.candle_store import OHLCV_COLUMNS
+from modules.detectors import VolumeZScore
+
 
 class Indicator:
     requires = []
@@ -295,6 +298,38 @@ class SMAVolumeIndicator(Indicator):
         )
 
 
+class VolumeAnomalyIndicator(Indicator):
+    target = 'volume'
+    row_height = 200
+
+    def __init__(self, window: int = 100, z: float = 3.0, color: str = 'crimson'):
+        self.window = window
+        self.z = z
+        self.color = color
+
+    def apply(self, fig: go.Figure, df, row: int, col: int = 1):
+        # Последняя свеча ещё не закрыта: она только проверяется, в статистику не входит
+        detector = VolumeZScore(self.window, self.z)
+        candles = df[list(OHLCV_COLUMNS)].itertuples(index=False)
+        mask = [detector.update(candle, closed=i < len(df) - 1) for i, candle in enumerate(candles)]
+        anomalies = df[mask]
+        fig.add_trace(
+            go.Scatter(
+                x=anomalies['timestamp'],
+                y=anomalies['volume'],
+                mode='markers',
+                name=f'Аномалии объёма (z > {self.z:g})',
+                marker=dict(
+                    color=self.color,
+                    size=8,
+                    symbol='triangle-up'
+                )
+            ),
+            row=row,
+            col=col
+        )
+
+
 class LongShortRatioIndicator(Indicator):
     target = 'ratio'
     row_height = 200
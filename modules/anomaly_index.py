@@ -0,0 +1,89 @@
+# flake8: noqa: E501
+"""
+Сохранённые на диск результаты поиска точек роста.
+
+Для каждого набора данных и параметров детектора (window, threshold_pct,
+cooldown) рядом с набором хранится datasets/<SYMBOL>/1m/anomalies/<ключ>.json:
+найденные индексы свечей и версия набора (dataset_version и rows), по
+которой они посчитаны.
+
+  - версия и rows совпадают — результат отдаётся без пересчёта;
+  - набор дописан (rows выросло, версия та же) — просматривается только
+    хвост: последние window - 1 старых свечей для SMA и новые свечи;
+  - версия сменилась (набор скачан заново или в середину вставлены
+    пропуски) — полный пересчёт.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from modules.dataset import dataset_version, read_dataset, read_meta
+from modules.detection import cooldown_filter, rolling_mean
+
+
+def index_path(path: Path, window: int, threshold_pct: float, cooldown: int) -> Path:
+    return Path(path) / "anomalies" / f"sma_w{window}_t{threshold_pct:g}_c{cooldown}.json"
+
+
+def _read_index(path: Path) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(path: Path, index: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    tmp_path.replace(path)
+
+
+def _breakouts_from(close: np.ndarray, start: int, window: int, threshold_pct: float) -> np.ndarray:
+    """
+    Превышения SMA начиная с индекса start (не раньше window, как у
+    sma_breakouts). Читаются только свечи, нужные для SMA хвоста.
+    """
+    start = max(start, window)
+    if start >= len(close):
+        return np.empty(0, dtype=np.int64)
+    offset = start - window + 1
+    tail = np.asarray(close[offset:], dtype=np.float64)
+    sma = rolling_mean(tail, window)
+    first = start - offset
+    mask = tail[first:] > sma[first:] * (1 + threshold_pct / 100)
+    return np.flatnonzero(mask) + start
+
+
+def load_growth_points(path: Path, window: int, threshold_pct: float, cooldown: int = 100) -> np.ndarray:
+    """
+    Точки роста набора данных path (как find_growth_points по колонке close)
+    с использованием и обновлением сохранённого индекса.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+
+    close = read_dataset(path, columns=("close",))["close"]
+    version = dataset_version(meta)
+    rows = len(close)
+
+    target = index_path(path, window, threshold_pct, cooldown)
+    index = _read_index(target)
+    if index is None or index.get("version") != version or index["rows"] > rows:
+        index = {"version": version, "rows": 0, "points": []}
+    elif index["rows"] == rows:
+        return np.asarray(index["points"], dtype=np.int64)
+
+    # Фильтр по cooldown жадный: продолжаем от последней оставленной точки
+    raw = _breakouts_from(close, index["rows"], window, threshold_pct)
+    if index["points"]:
+        raw = raw[raw > index["points"][-1] + cooldown]
+    index["points"].extend(cooldown_filter(raw, cooldown).tolist())
+    index["rows"] = rows
+    _write_index(target, index)
+    return np.asarray(index["points"], dtype=np.int64)
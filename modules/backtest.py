@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from modules.calculations import DEFAULT_TIERS, TierTable, calculate_liquidation_batch
+
+
+def _range_min_table(values: np.ndarray, horizon: int) -> list[np.ndarray]:
+    """
+    Sparse table минимумов: table[k][i] = min(values[i : i + 2**k]).
+    Окна, выходящие за конец массива, дополняются +inf.
+    """
+    table = [values]
+    width = 1
+    while width * 2 <= horizon:
+        prev = table[-1]
+        level = np.full_like(prev, np.inf)
+        level[:-width] = np.minimum(prev[:-width], prev[width:])
+        table.append(level)
+        width *= 2
+    return table
+
+
+def first_touch(
+    table: list[np.ndarray],
+    threshold: np.ndarray,
+    horizon: int,
+) -> np.ndarray:
+    """
+    Для каждой свечи i ищет первое t в [1, horizon], при котором
+    values[i + t] <= threshold[i]. Возвращает t или 0, если касания нет.
+
+    Поиск — двоичный подъём по sparse table: на каждом уровне k все
+    позиции разом сдвигаются на 2**k свечей, если на этом отрезке касания
+    ещё не было. Итого O(n · log horizon) без цикла по строкам.
+    """
+    values = table[0]
+    n = len(values)
+    idx = np.arange(n)
+    advanced = np.zeros(n, dtype=np.int64)
+
+    for k in range(len(table) - 1, -1, -1):
+        step = 1 << k
+        start = idx + 1 + advanced
+        can_move = advanced + step <= horizon
+        window_min = np.full(n, -np.inf)
+        inside = can_move & (start < n)
+        window_min[inside] = table[k][start[inside]]
+        move = can_move & ((window_min > threshold) | (start >= n))
+        advanced += np.where(move, step, 0)
+
+    touch = idx + advanced + 1
+    hit = (advanced < horizon) & (touch < n)
+    hit[hit] = values[touch[hit]] <= threshold[hit]
+    return np.where(hit, advanced + 1, 0)
+
+
+def liquidation_backtest(
+    df: pd.DataFrame,
+    leverage: float,
+    position_type: str,
+    initial_deposit: float,
+    support_investment: float = 0.0,
+    horizon: int = 1440,
+    tiers: TierTable = DEFAULT_TIERS,
+    _tables: dict | None = None,
+) -> pd.DataFrame:
+    """
+    Каждая свеча — гипотетический вход по цене закрытия. Для горизонта
+    horizon свечей вперёд проверяет, коснулась ли цена (low для Long,
+    high для Short) цены ликвидации из calculate_liquidation и когда.
+
+    Входы, для которых горизонт выходит за конец данных, отбрасываются.
+
+    Returns
+    -------
+    pd.DataFrame
+        timestamp, entry_price, liquidation_price, liquidated (bool),
+        candles_to_liquidation (0, если ликвидации не было).
+    """
+    is_long = position_type == "Long"
+    close = df["close"].to_numpy(dtype=np.float64)
+
+    liq_price, _ = calculate_liquidation_batch(
+        close, leverage, position_type, initial_deposit, support_investment, tiers
+    )
+
+    # Short сводится к Long сменой знака: high >= liq  <=>  -high <= -liq
+    key = "low" if is_long else "high"
+    tables = _tables if _tables is not None else {}
+    if key not in tables:
+        values = df[key].to_numpy(dtype=np.float64)
+        tables[key] = _range_min_table(values if is_long else -values, horizon)
+    threshold = liq_price if is_long else -liq_price
+
+    steps = first_touch(tables[key], threshold, horizon)
+
+    n_entries = max(len(df) - horizon, 0)
+    return pd.DataFrame({
+        "timestamp": df["timestamp"].to_numpy()[:n_entries],
+        "entry_price": close[:n_entries],
+        "liquidation_price": liq_price[:n_entries],
+        "liquidated": steps[:n_entries] > 0,
+        "candles_to_liquidation": steps[:n_entries],
+    })
+
+
+def liquidation_survival(
+    df: pd.DataFrame,
+    leverages: list[float],
+    position_type: str,
+    initial_deposit: float,
+    support_investment: float = 0.0,
+    horizon: int = 1440,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Прогоняет liquidation_backtest для каждого плеча, переиспользуя
+    sparse table по ценам.
+
+    Returns
+    -------
+    summary : pd.DataFrame
+        leverage, entries, liquidation_probability, median_candles_to_liquidation.
+    survival : pd.DataFrame
+        Индекс — свеча после входа (1..horizon), колонки — плечо,
+        значения — доля входов, ещё не ликвидированных к этой свече.
+    """
+    tables = {}
+    summary = []
+    survival = {}
+
+    for leverage in leverages:
+        result = liquidation_backtest(
+            df, leverage, position_type, initial_deposit,
+            support_investment, horizon, tiers, _tables=tables,
+        )
+        entries = len(result)
+        steps = result["candles_to_liquidation"].to_numpy()
+        hit_steps = steps[steps > 0]
+
+        counts = np.bincount(hit_steps, minlength=horizon + 1)[1:]
+        survival[leverage] = 1 - np.cumsum(counts) / max(entries, 1)
+
+        summary.append({
+            "leverage": leverage,
+            "entries": entries,
+            "liquidation_probability": len(hit_steps) / entries if entries else np.nan,
+            "median_candles_to_liquidation": np.median(hit_steps) if len(hit_steps) else np.nan,
+        })
+
+    survival = pd.DataFrame(survival, index=pd.RangeIndex(1, horizon + 1, name="candles"))
+    return pd.DataFrame(summary), survival
@@ -0,0 +1,265 @@
+"""
+Замеры скорости горячих участков на синтетических данных.
+
+Запуск: python -m modules.benchmarks [имя ...]
+Без аргументов выполняются все замеры.
+"""
+import sys
+import time
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def _best_of(func, repeat: int = 5) -> float:
+    """
+    Лучшее время из нескольких запусков, секунды.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _report(name: str, baseline: float, optimized: float) -> None:
+    print(
+        f"{name}: было {baseline * 1000:.2f} мс, "
+        f"стало {optimized * 1000:.2f} мс, "
+        f"ускорение x{baseline / optimized:.1f}"
+    )
+
+
+def synthetic_tickers_payload(n: int = 500, seed: int = 0) -> bytes:
+    """
+    Ответ /v5/market/tickers?category=linear с n контрактами.
+    """
+    rng = np.random.default_rng(seed)
+    funding_times = 1_700_000_000_000 + 8 * 3600 * 1000 * rng.integers(0, 3, n)
+    items = []
+    for i in range(n):
+        price = float(rng.uniform(0.001, 50_000))
+        items.append({
+            "symbol": f"COIN{i}USDT",
+            "lastPrice": f"{price:.4f}",
+            "price24hPcnt": f"{rng.normal(0, 0.05):.6f}",
+            "highPrice24h": f"{price * 1.05:.4f}",
+            "lowPrice24h": f"{price * 0.95:.4f}",
+            "turnover24h": f"{rng.uniform(1e4, 1e10):.4f}",
+            "volume24h": f"{rng.uniform(1e3, 1e8):.4f}",
+            "fundingRate": f"{rng.normal(0, 0.0001):.8f}",
+            "nextFundingTime": str(int(funding_times[i])),
+            "openInterest": f"{rng.uniform(1e3, 1e8):.4f}",
+            "bid1Price": f"{price * 0.9999:.4f}",
+            "ask1Price": f"{price * 1.0001:.4f}",
+        })
+    return json.dumps({"retCode": 0, "result": {"category": "linear", "list": items}}).encode()
+
+
+def _tickers_loop(payload: bytes, exchange) -> pd.DataFrame:
+    """
+    Прежний разбор тикеров: json, нормализация каждого тикера в ccxt
+    (как внутри fetch_tickers) и построчный цикл с float() и
+    datetime.fromtimestamp() на каждый контракт.
+    """
+    data = []
+    tickers = exchange.parse_tickers(json.loads(payload)["result"]["list"])
+    for ticker in (t['info'] for t in tickers.values()):
+        data.append({
+            'symbol': ticker['symbol'],
+            'last_price': float(ticker['lastPrice']),
+            '24h_change': round(float(ticker['price24hPcnt']) * 100, 2),
+            '24h_high': float(ticker['highPrice24h']),
+            '24h_low': float(ticker['lowPrice24h']),
+            'volume_24h_mln_usdt': round(float(ticker['turnover24h']) / 1e6, 2),
+            'funding_rate': ticker['fundingRate'],
+            'next_funding_time': (
+                datetime
+                .fromtimestamp(int(ticker['nextFundingTime']) / 1000)
+                .strftime('%Y-%m-%d %H:%M')
+            ),
+        })
+    return pd.DataFrame(data)
+
+
+def bench_tickers(n: int = 500) -> None:
+    """
+    get_tickers: ccxt + построчный цикл против разбора по колонкам.
+    Сеть не участвует, сравнивается только разбор ответа.
+    """
+    import ccxt
+    from modules.data_loader import tickers_frame
+    from modules.http_client import json_loads
+
+    exchange = ccxt.bybit()
+    payload = synthetic_tickers_payload(n)
+    expected = _tickers_loop(payload, exchange)
+    result = tickers_frame(json_loads(payload)["result"]["list"])
+    # round() и Series.round() расходятся на половинках в последнем знаке
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=0, atol=0.011)
+
+    baseline = _best_of(lambda: _tickers_loop(payload, exchange))
+    optimized = _best_of(lambda: tickers_frame(json_loads(payload)["result"]["list"]))
+    _report(f"tickers ({n} контрактов)", baseline, optimized)
+
+
+def synthetic_ohlcv(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    n минутных свечей случайного блуждания (timestamp — int64 мс).
+    """
+    rng = np.random.default_rng(seed)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    spread = close * rng.uniform(0, 0.002, n)
+    return pd.DataFrame({
+        "timestamp": 1_600_000_000_000 + 60_000 * np.arange(n, dtype=np.int64),
+        "open": np.roll(close, 1),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(0, 100, n),
+    })
+
+
+def bench_dataset(n: int = 525_600) -> None:
+    """
+    Открытие года минутных свечей: CSV (как читала страница Entry point)
+    против колоночного набора данных в вариантах float64, float32 и gzip.
+    """
+    from modules.dataset import DatasetWriter, load_dataset_frame, read_dataset
+
+    df = synthetic_ohlcv(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        csv_path = root / "X.csv"
+        csv_df = df.copy()
+        csv_df["timestamp"] = pd.to_datetime(csv_df["timestamp"], unit="ms")
+        csv_df.to_csv(csv_path, index=False)
+
+        def read_csv():
+            frame = pd.read_csv(csv_path, parse_dates=["timestamp"])
+            frame.sort_values("timestamp", inplace=True)
+            frame.reset_index(drop=True, inplace=True)
+            return frame
+
+        baseline = _best_of(read_csv, repeat=3)
+        csv_mb = csv_path.stat().st_size / 1e6
+        print(f"CSV: {csv_mb:.1f} МБ, чтение {baseline * 1000:.0f} мс")
+
+        variants = {
+            "float64": {},
+            "float32": {"price_dtype": "float32"},
+            "gzip": {"compression": "gzip"},
+        }
+        for name, options in variants.items():
+            path = root / name
+            writer = DatasetWriter(path, "1m", reset=True, **options)
+            writer.append(df.to_numpy(dtype=np.float64))
+            size_mb = sum(f.stat().st_size for f in path.iterdir()) / 1e6
+
+            loaded = load_dataset_frame(path)
+            assert (loaded["timestamp"].to_numpy() == csv_df["timestamp"].to_numpy()).all()
+            _report(f"набор данных {name} ({size_mb:.1f} МБ) -> DataFrame", baseline, _best_of(lambda: load_dataset_frame(path)))
+
+        _report("набор данных float64 -> memmap", baseline, _best_of(lambda: read_dataset(root / "float64")))
+
+
+def _find_anomalies_loop(df: pd.DataFrame, window: int, threshold_pct: float, cooldown: int) -> list:
+    """
+    Прежний поиск точек роста со страницы Entry point: цикл с df.loc
+    и построчный фильтр по cooldown.
+    """
+    df = df.copy()
+    df["sma"] = df["close"].rolling(window=window).mean()
+    anomalies = []
+    for i in range(window, len(df)):
+        sma = df.loc[i, "sma"]
+        close = df.loc[i, "close"]
+        if pd.notna(sma) and close > sma * (1 + threshold_pct / 100):
+            anomalies.append(i)
+
+    filtered = []
+    last_used_index = -1
+    for idx in anomalies:
+        if idx > last_used_index + cooldown:
+            filtered.append(idx)
+            last_used_index = idx
+    return filtered
+
+
+def bench_detection(n: int = 525_600, window: int = 1440, threshold_pct: float = 1.0) -> None:
+    """
+    Точки роста на годе минутных свечей: цикл против масок NumPy.
+    """
+    from modules.detection import find_growth_points
+
+    df = synthetic_ohlcv(n)
+    close = df["close"].to_numpy()
+    expected = _find_anomalies_loop(df, window, threshold_pct, 100)
+    result = find_growth_points(close, window, threshold_pct, cooldown=100)
+    assert result.tolist() == expected, (len(result), len(expected))
+
+    baseline = _best_of(lambda: _find_anomalies_loop(df, window, threshold_pct, 100), repeat=1)
+    optimized = _best_of(lambda: find_growth_points(close, window, threshold_pct, cooldown=100))
+    _report(f"точки роста ({n} свечей, window={window}, найдено {len(result)})", baseline, optimized)
+
+
+def synthetic_positions(n: int, seed: int = 0) -> dict:
+    """
+    n позиций со случайными ценой, плечом, депозитом и типом — на все
+    уровни риска, включая последний.
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        "entry_price": rng.uniform(0.001, 70_000, n),
+        "leverage": rng.integers(1, 101, n).astype(np.float64),
+        "position_type": np.where(rng.random(n) < 0.5, "Long", "Short"),
+        "initial_deposit": rng.uniform(10, 1e6, n),
+        "support_investment": rng.uniform(0, 1e5, n),
+    }
+
+
+def bench_liquidation(n: int = 1_000_000) -> None:
+    """
+    Цена ликвидации: цикл по calculate_liquidation против
+    calculate_liquidation_batch. Результаты должны совпадать бит в бит.
+    """
+    from modules.calculations import calculate_liquidation, calculate_liquidation_batch
+
+    positions = synthetic_positions(n)
+    rows = list(zip(*(positions[name].tolist() for name in positions)))
+    is_long = positions["position_type"] == "Long"
+    arguments = dict(positions, position_type=is_long)
+
+    def loop():
+        return [calculate_liquidation(*row) for row in rows]
+
+    expected = np.array(loop()).T
+    for position_type in (is_long, positions["position_type"]):
+        result = calculate_liquidation_batch(**dict(arguments, position_type=position_type))
+        assert np.array_equal(result[0], expected[0]) and np.array_equal(result[1], expected[1])
+
+    baseline = _best_of(loop, repeat=1)
+    _report(f"ликвидация ({n} позиций, тип — bool)", baseline, _best_of(lambda: calculate_liquidation_batch(**arguments)))
+    _report(
+        f"ликвидация ({n} позиций, тип — строки)", baseline,
+        _best_of(lambda: calculate_liquidation_batch(**dict(arguments, position_type=positions["position_type"]))),
+    )
+
+
+BENCHMARKS = {
+    "tickers": bench_tickers,
+    "dataset": bench_dataset,
+    "detection": bench_detection,
+    "liquidation": bench_liquidation,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
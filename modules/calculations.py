@@ -1,7 +1,10 @@
-from typing import Literal, Union
+from typing import Literal, NamedTuple, Union
+from bisect import bisect_left
 from decimal import Decimal
 import re
 
+import numpy as np
+
 
 RISK_LEVELS = [
     {"limit": 100_000, "mmr": 0.02, "reduction": 0},
@@ -12,11 +15,49 @@ RISK_LEVELS = [
 ]
 
 
-def get_maintenance_margin(position_value: float) -> tuple[float, float]:
-    for level in RISK_LEVELS:
-        if position_value <= level["limit"]:
-            return level["mmr"], level["reduction"]
-    return RISK_LEVELS[-1]["mmr"], RISK_LEVELS[-1]["reduction"]
+
+class TierTable(NamedTuple):
+    """
+    Таблица уровней риска, отсортированная по лимиту позиции.
+    Хранится кортежами, поэтому хешируется и годится как ключ кеша.
+    """
+    limits: tuple[float, ...]
+    mmr: tuple[float, ...]
+    reduction: tuple[float, ...]
+
+    @classmethod
+    def from_levels(cls, levels: list[dict]) -> "TierTable":
+        levels = sorted(levels, key=lambda level: level["limit"])
+        return cls(
+            limits=tuple(float(level["limit"]) for level in levels),
+            mmr=tuple(float(level["mmr"]) for level in levels),
+            reduction=tuple(float(level["reduction"]) for level in levels),
+        )
+
+    def lookup(self, position_value: float) -> tuple[float, float]:
+        """
+        Бинарный поиск первого уровня с limit >= position_value.
+        Позиции больше последнего лимита получают последний уровень.
+        """
+        i = min(bisect_left(self.limits, position_value), len(self.limits) - 1)
+        return self.mmr[i], self.reduction[i]
+
+    def as_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.asarray(self.limits, dtype=np.float64),
+            np.asarray(self.mmr, dtype=np.float64),
+            np.asarray(self.reduction, dtype=np.float64),
+        )
+
+
+DEFAULT_TIERS = TierTable.from_levels(RISK_LEVELS)
+
+
+def get_maintenance_margin(
+    position_value: float,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> tuple[float, float]:
+    return tiers.lookup(position_value)
 
 
 def calculate_liquidation(
@@ -24,13 +65,14 @@ def calculate_liquidation(
     leverage: int,
     position_type: Literal["Long", "Short"],
     initial_deposit: float,
-    support_investment: float
-) -> float:
+    support_investment: float,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> tuple[float, float]:
 
     pos_value = initial_deposit * leverage
     total_margin = initial_deposit + support_investment
 
-    mmr, mm_reduction = get_maintenance_margin(pos_value)
+    mmr, mm_reduction = get_maintenance_margin(pos_value, tiers)
     main_margin = pos_value * mmr - mm_reduction
 
     if position_type == "Long":
@@ -42,6 +84,95 @@ def calculate_liquidation(
     liquidation_dist = abs((liquidation_price - entry_price) / entry_price * 100)
     return liquidation_price, liquidation_dist
 
+
+# До стольких уровней номер уровня считается сравнениями, дальше — searchsorted
+_MAX_COUNTED_TIERS = 16
+
+
+def as_is_long(position_type) -> np.ndarray:
+    """
+    Приводит тип позиции к булеву массиву (True — Long).
+    Принимает строки "Long"/"Short" или уже готовый булев массив.
+    """
+    position_type = np.asarray(position_type)
+    if position_type.dtype == np.bool_:
+        return position_type
+    return np.asarray(position_type == "Long")
+
+
+def calculate_liquidation_batch(
+    entry_price,
+    leverage,
+    position_type,
+    initial_deposit,
+    support_investment,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Векторная версия calculate_liquidation для массивов позиций.
+
+    Аргументы — массивы (или скаляры) с поддержкой broadcasting.
+    position_type — массив строк "Long"/"Short" либо булев массив,
+    где True означает Long. Уровень риска выбирается через searchsorted
+    по лимитам уровней, результат совпадает с calculate_liquidation бит в бит.
+
+    Возвращает кортеж массивов (liquidation_price, liquidation_dist).
+    """
+    entry_price = np.asarray(entry_price, dtype=np.float64)
+    leverage = np.asarray(leverage, dtype=np.float64)
+    initial_deposit = np.asarray(initial_deposit, dtype=np.float64)
+    support_investment = np.asarray(support_investment, dtype=np.float64)
+    is_long = as_is_long(position_type)
+    shape = np.broadcast_shapes(
+        entry_price.shape, leverage.shape, is_long.shape,
+        initial_deposit.shape, support_investment.shape,
+    )
+
+    # Три буфера полной формы на весь расчёт: временные массивы по 8 МБ
+    # на миллион позиций стоят дороже самой арифметики
+    pos_value = np.multiply(initial_deposit, leverage, out=np.empty(shape))
+    main_margin = np.empty(shape)
+    ratio = np.empty(shape)
+
+    # Первый уровень с limit >= pos_value, выше последнего — последний уровень
+    limits, mmr, reduction = tiers.as_arrays()
+    if len(limits) <= _MAX_COUNTED_TIERS:
+        # Номер уровня — число лимитов строго меньше pos_value (как side="left");
+        # на нескольких уровнях сравнения дешевле двоичного поиска
+        counts = np.zeros(shape, dtype=np.uint8)
+        for limit in limits[:-1]:
+            np.add(counts, pos_value > limit, out=counts)
+        tier = counts.astype(np.intp)
+    else:
+        tier = np.searchsorted(limits, pos_value, side="left")
+        np.minimum(tier, len(limits) - 1, out=tier)
+    # mode="clip": с mode="raise" take копирует out ради проверки индексов,
+    # а tier и так в пределах таблицы
+    np.take(mmr, tier, out=main_margin, mode="clip")
+    main_margin *= pos_value
+    main_margin -= np.take(reduction, tier, out=ratio, mode="clip")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Те же операции в том же порядке, что в скалярной формуле.
+        # 1 - x для Long и 1 + x для Short: умножение на -1 (1 - 2 * is_long)
+        # точное, поэтому результат не отличается бит в бит
+        np.add(initial_deposit, support_investment, out=ratio)
+        ratio -= main_margin
+        ratio /= pos_value
+        sign = np.multiply(is_long, -2.0, out=main_margin)
+        sign += 1
+        ratio *= sign
+        ratio += 1
+        liquidation_price = np.multiply(entry_price, ratio, out=ratio)
+        liquidation_dist = np.subtract(liquidation_price, entry_price, out=main_margin)
+        liquidation_dist /= entry_price
+        liquidation_dist *= 100
+        np.abs(liquidation_dist, out=liquidation_dist)
+
+    # [()] — скаляры для скалярных входов, как у обычной арифметики NumPy
+    return liquidation_price[()], liquidation_dist[()]
+
+
 def count_decimal_places(x: Union[str, float, int]) -> int:
     """
     Возвращает количество значащих цифр после десятичной точки у X,
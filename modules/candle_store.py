@@ -0,0 +1,253 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+OHLCV_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+OHLCV_DTYPES = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+
+
+class CandleStore:
+    """
+    Колоночное хранилище свечей на диске: каталог с файлом на каждую
+    колонку (сырые little-endian массивы) и meta.json.
+
+    Запись — добавление в конец, плюс перезапись последней строки
+    (незакрытая свеча обновляется, пока не закроется). Более старая история
+    добавляется в начало перезаписью колонок (prepend), устаревшее
+    хранилище сбрасывается целиком (reset). Чтение — memmap, без разбора
+    и копирования. Временные метки — int64 в миллисекундах.
+
+    Экземпляр потокобезопасен; для одного каталога используйте один
+    экземпляр (см. open_candle_store).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._dtypes = {name: np.dtype(OHLCV_DTYPES[name]) for name in OHLCV_COLUMNS}
+
+        self._meta_path = self.path / "meta.json"
+        if not self._meta_path.exists():
+            self._write_meta({})
+
+        self._length = self._repair()
+
+    def _read_meta(self) -> dict:
+        with open(self._meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: dict) -> None:
+        meta["columns"] = {name: dtype.str for name, dtype in self._dtypes.items()}
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        tmp_path.replace(self._meta_path)
+
+    def _column_path(self, name: str) -> Path:
+        return self.path / f"{name}.bin"
+
+    def _repair(self) -> int:
+        """
+        Обрезает колонки до общей длины: после сбоя посреди добавления
+        часть колонок может оказаться на строку длиннее. Сбой посреди
+        prepend сдвигает колонки друг относительно друга — тогда
+        хранилище очищается (это кеш, свечи загрузятся снова).
+        """
+        if self._read_meta().get("prepending"):
+            for name in OHLCV_COLUMNS:
+                self._column_path(name).write_bytes(b"")
+            self._write_meta({})
+
+        lengths = {}
+        for name, dtype in self._dtypes.items():
+            column_path = self._column_path(name)
+            size = column_path.stat().st_size if column_path.exists() else 0
+            lengths[name] = size // dtype.itemsize
+
+        length = min(lengths.values())
+        for name, dtype in self._dtypes.items():
+            column_path = self._column_path(name)
+            if not column_path.exists():
+                column_path.touch()
+            if column_path.stat().st_size != length * dtype.itemsize:
+                os.truncate(column_path, length * dtype.itemsize)
+        return length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def last_timestamp(self) -> int | None:
+        if not self._length:
+            return None
+        return int(self._column("timestamp")[-1])
+
+    @property
+    def first_timestamp(self) -> int | None:
+        if not self._length:
+            return None
+        return int(self._column("timestamp")[0])
+
+    @property
+    def history_start(self) -> int | None:
+        """
+        С какого момента история уже запрашивалась у биржи: раньше
+        первой сохранённой свечи биржа ничего не отдала (монета моложе).
+        """
+        return self._read_meta().get("history_start")
+
+    def _column(self, name: str) -> np.ndarray:
+        if not self._length:
+            return np.empty(0, dtype=self._dtypes[name])
+        return np.memmap(
+            self._column_path(name),
+            dtype=self._dtypes[name],
+            mode="r",
+            shape=(self._length,),
+        )
+
+    def read(self, tail: int | None = None) -> dict[str, np.ndarray]:
+        """
+        Колонки как memmap-массивы (только чтение). tail — последние N строк.
+        """
+        with self._lock:
+            columns = {name: self._column(name) for name in OHLCV_COLUMNS}
+        if tail is not None:
+            columns = {name: values[-tail:] for name, values in columns.items()}
+        return columns
+
+    def to_frame(self, tail: int | None = None) -> pd.DataFrame:
+        columns = self.read(tail)
+        df = pd.DataFrame({name: np.asarray(columns[name]) for name in OHLCV_COLUMNS})
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+    def merge(self, candles: list[list]) -> int:
+        """
+        Вливает свечи ccxt ([timestamp, open, high, low, close, volume], по
+        возрастанию времени): строка с тем же временем, что последняя в
+        хранилище, перезаписывает её, более новые добавляются, более старые
+        пропускаются. Возвращает число добавленных строк.
+        """
+        if not candles:
+            return 0
+
+        data = np.asarray(candles, dtype=np.float64)
+        timestamps = data[:, 0].astype(np.int64)
+
+        with self._lock:
+            last = self.last_timestamp
+            if last is not None:
+                same = timestamps == last
+                if same.any():
+                    self._patch_last(data[same][-1])
+                newer = timestamps > last
+                data, timestamps = data[newer], timestamps[newer]
+
+            if not len(data):
+                return 0
+
+            # Внутри пачки — по возрастанию и без повторов
+            timestamps, first = np.unique(timestamps, return_index=True)
+            data = data[first]
+
+            for i, name in enumerate(OHLCV_COLUMNS):
+                values = timestamps if name == "timestamp" else data[:, i]
+                with open(self._column_path(name), "ab") as f:
+                    f.write(np.ascontiguousarray(values, dtype=self._dtypes[name]).tobytes())
+            self._length += len(data)
+            return len(data)
+
+    def prepend(self, candles: list[list], history_start: int | None = None) -> int:
+        """
+        Добавляет в начало свечи старше первой сохранённой. Колонки
+        переписываются целиком, поэтому вызывать стоит одной пачкой на
+        весь недостающий диапазон. history_start — с какого момента
+        запрашивалась история (см. history_start). Возвращает число
+        добавленных строк.
+        """
+        data = np.asarray(candles, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+        timestamps = data[:, 0].astype(np.int64)
+
+        with self._lock:
+            first = self.first_timestamp
+            if first is not None:
+                older = timestamps < first
+                data, timestamps = data[older], timestamps[older]
+            timestamps, unique = np.unique(timestamps, return_index=True)
+            data = data[unique]
+
+            meta = self._read_meta()
+            if history_start is not None:
+                meta["history_start"] = int(history_start)
+            if len(data):
+                meta["prepending"] = True
+                self._write_meta(meta)
+                for i, name in enumerate(OHLCV_COLUMNS):
+                    values = timestamps if name == "timestamp" else data[:, i]
+                    column_path = self._column_path(name)
+                    tmp_path = column_path.with_suffix(".tmp")
+                    with open(tmp_path, "wb") as f:
+                        f.write(np.ascontiguousarray(values, dtype=self._dtypes[name]).tobytes())
+                        with open(column_path, "rb") as source:
+                            shutil.copyfileobj(source, f)
+                    tmp_path.replace(column_path)
+                self._length += len(data)
+                del meta["prepending"]
+            self._write_meta(meta)
+            return len(data)
+
+    def reset(self) -> None:
+        """
+        Очищает хранилище: используется, когда сохранённые свечи
+        закончились раньше нужного окна и между ними была бы дыра.
+        Колонки заменяются новыми пустыми файлами, как в prepend, а не
+        обрезаются: memmap-массивы, которые уже вернул read(), читают
+        старые файлы, а чтение обрезанного под memmap файла роняет
+        процесс (SIGBUS).
+        """
+        with self._lock:
+            for name in OHLCV_COLUMNS:
+                column_path = self._column_path(name)
+                tmp_path = column_path.with_suffix(".tmp")
+                tmp_path.write_bytes(b"")
+                tmp_path.replace(column_path)
+            self._length = 0
+            self._write_meta({})
+
+    def _patch_last(self, row: np.ndarray) -> None:
+        for i, name in enumerate(OHLCV_COLUMNS[1:], start=1):
+            dtype = self._dtypes[name]
+            with open(self._column_path(name), "r+b") as f:
+                f.seek((self._length - 1) * dtype.itemsize)
+                f.write(np.asarray([row[i]], dtype=dtype).tobytes())
+
+
+_stores: dict[Path, CandleStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_candle_store(root: Path, symbol: str, timeframe: str) -> CandleStore:
+    """
+    Общий на процесс экземпляр хранилища для (symbol, timeframe).
+    """
+    path = Path(root) / symbol.replace("/", "").replace(":", "_") / timeframe
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = CandleStore(path)
+        return store
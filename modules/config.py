@@ -0,0 +1,9 @@
+"""
+Общие пути приложения. Модуль без зависимостей: его можно импортировать
+и из расчётных модулей, не подтягивая ccxt и Streamlit.
+"""
+from pathlib import Path
+
+
+# Локальный кеш данных биржи (снапшоты, которые переживают перезапуск)
+CACHE_DIR = Path(".cache")
@@ -3,10 +3,43 @@
 import ccxt
 import pandas as pd
 import streamlit as st
-from datetime import datetime, timedelta
+from datetime import timedelta
 import httpx
 import asyncio
+import functools
+import numpy as np
 from ccxt.async_support import bybit as AsyncBybit
+from modules.candle_store import OHLCV_COLUMNS, CandleStore, open_candle_store
+from modules.config import CACHE_DIR
+from modules.resample import TIMEFRAME_MS, TimeframeResampler
+from modules.streaming import KLINE_INTERVALS, MarketStream
+from modules.http_client import get_http_client, json_loads
+from modules.singleflight import get_single_flight
+from modules.swr_cache import swr_cache
+from pathlib import Path
+from dateutil.tz import tzlocal
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+MARKETS_PATH = CACHE_DIR / "bybit_markets.json"
+MARKETS_TTL = 24 * 60 * 60  # секунд
+CANDLES_DIR = CACHE_DIR / "candles"
+OHLCV_PAGE_LIMIT = 1000  # максимум свечей в одном ответе Bybit
+
+# Потоковый режим: BYBIT_STREAMING=1 — тикер и свечи приходят по WebSocket,
+# REST нужен только для начальной истории
+STREAMING_ENABLED = os.getenv("BYBIT_STREAMING", "0") == "1"
+STREAM_BUFFER_SIZE = 5000  # максимум «Свечей на графике»: график целиком берётся из потока
+
+# Таймфреймы, которые собираются локально из минутных свечей. Сборка
+# выгодна, пока нужная минутная история укладывается в один ответ биржи,
+# иначе старший таймфрейм дешевле запросить напрямую
+DERIVED_TIMEFRAMES = ("5m", "15m", "1h")
+DERIVED_MAX_1M_CANDLES = OHLCV_PAGE_LIMIT
 
 
 _PERIOD_DELTAS = {
@@ -18,12 +51,136 @@ _PERIOD_DELTAS = {
 }
 
 
+class RequestSlots:
+    """
+    Общий на процесс лимит запросов к Bybit для синхронного клиента
+    и асинхронных клиентов всех asyncio.run. Слот запроса резервируется
+    под threading-замком, а ждёт его каждый сам: поток — time.sleep,
+    корутина — asyncio.sleep в своём цикле событий.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def reserve(self, interval: float) -> float:
+        """
+        Занимает следующий слот длиной interval секунд и возвращает,
+        сколько секунд ждать до его начала.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + interval
+            return start - now
+
+
+_bybit_request_slots = RequestSlots()
+
+
+def _request_interval(exchange, cost) -> float:
+    return exchange.rateLimit * (1 if cost is None else cost) / 1000
+
+
+class SharedBybit(ccxt.bybit):
+    """
+    ccxt.bybit, который безопасно делить между потоками (сессиями Streamlit).
+    Базовый throttle() читает время последнего запроса без блокировки,
+    поэтому параллельные потоки проходят лимит одновременно. Здесь слот
+    запроса резервируется в общем RequestSlots, и лимит соблюдается для
+    всех сессий вместе с асинхронными клиентами.
+    """
+
+    def throttle(self, cost=None):
+        delay = _bybit_request_slots.reserve(_request_interval(self, cost))
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SharedAsyncBybit(AsyncBybit):
+    """
+    Асинхронный ccxt.bybit с тем же общим лимитом, что у SharedBybit.
+    Свой throttler у каждого клиента живёт один asyncio.run, и параллельные
+    загрузки страниц не видели бы друг друга.
+    """
+
+    async def throttle(self, cost=None):
+        delay = _bybit_request_slots.reserve(_request_interval(self, cost))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Разобранный снапшот рынков: (путь, mtime) -> snapshot. Асинхронный клиент
+# создаётся на каждый asyncio.run, а файл перечитывается, только если изменился
+_markets_snapshot_cache: dict[tuple[str, int], dict] = {}
+_markets_snapshot_lock = threading.Lock()
+
+
+def _read_markets_snapshot(path: Path = MARKETS_PATH, ttl: float = MARKETS_TTL):
+    try:
+        key = (str(path), os.stat(path).st_mtime_ns)
+        with _markets_snapshot_lock:
+            snapshot = _markets_snapshot_cache.get(key)
+            if snapshot is None:
+                with open(path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                _markets_snapshot_cache.clear()
+                _markets_snapshot_cache[key] = snapshot
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - snapshot.get("saved_at", 0) > ttl:
+        return None
+    return snapshot
+
+
+def _write_markets_snapshot(exchange, path: Path = MARKETS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "saved_at": time.time(),
+            "markets": exchange.markets,
+            "currencies": exchange.currencies,
+        }, f)
+    tmp_path.replace(path)
+
+
+def _warm_markets(exchange) -> None:
+    """
+    Подставляет рынки из снапшота на диске. Если снапшота нет
+    или он устарел, загружает рынки с биржи и сохраняет снапшот.
+    """
+    snapshot = _read_markets_snapshot()
+    if snapshot is not None:
+        exchange.set_markets(snapshot["markets"], snapshot["currencies"])
+        return
+
+    try:
+        exchange.load_markets()
+        _write_markets_snapshot(exchange)
+    except Exception as e:
+        # Рынки догрузятся при первом запросе
+        print(f"Не удалось загрузить рынки Bybit: {e}")
+
+
+@st.cache_resource
+def _shared_bybit_exchange() -> SharedBybit:
+    exchange = SharedBybit({
+        'enableRateLimit': True,
+        'options': {'defaultType': 'future'}
+    })
+    _warm_markets(exchange)
+    return exchange
+
+
 def get_bybit_exchange():
+    """
+    Один клиент ccxt на процесс: общие рынки и общий лимит запросов
+    для всех страниц и сессий.
+    """
     try:
-        exchange = ccxt.bybit({
-            'enableRateLimit': True,
-            'options': {'defaultType': 'future'}
-        })
+        exchange = _shared_bybit_exchange()
 
     except Exception as e:
         st.error(f"Ошибка при подключении к Bybit: {e}")
@@ -34,10 +191,15 @@ def get_bybit_exchange():
 
 def get_bybit_async():
     try:
-        exchange = AsyncBybit({
+        exchange = SharedAsyncBybit({
             'enableRateLimit': True,
             'options': {'defaultType': 'future'}
         })
+        # Асинхронный клиент живёт один asyncio.run, рынки берём из снапшота
+        # (разобранного один раз на процесс, пока файл не изменился)
+        snapshot = _read_markets_snapshot()
+        if snapshot is not None:
+            exchange.set_markets(snapshot["markets"], snapshot["currencies"])
 
     except Exception as e:
         st.error(f"Ошибка при подключении к Bybit async: {e}")
@@ -46,91 +208,394 @@ def get_bybit_async():
     return exchange
 
 
-@st.cache_data(ttl=60)
+@st.cache_resource
+def get_market_stream() -> MarketStream | None:
+    """
+    Общий на процесс WebSocket-поток Bybit, если включён STREAMING_ENABLED.
+    """
+    if not STREAMING_ENABLED:
+        return None
+    stream = MarketStream(buffer_size=STREAM_BUFFER_SIZE)
+    stream.on_reconnect = functools.partial(_reseed_stream, stream)
+    return stream
+
+
+def _reseed_stream(stream: MarketStream, keys: list[tuple[str, str]]) -> None:
+    """
+    После переподключения WebSocket догружает из REST свечи, закрывшиеся
+    без соединения, и заново заполняет ими буферы потока.
+    """
+    exchange = _shared_bybit_exchange()
+    for symbol, timeframe in keys:
+        try:
+            # Догружается только пропущенный хвост: окно — сколько свечей уже хранится
+            limit = max(len(open_candle_store(CANDLES_DIR, symbol, timeframe)), 1)
+            store = update_ohlcv_store(exchange, symbol, timeframe, limit)
+            _seed_stream(symbol, timeframe, store, stream)
+        except Exception as e:
+            # Буфер остаётся незаполненным: страница сама возьмёт свечи из REST
+            print(f"Не удалось заполнить поток {symbol} {timeframe} после переподключения: {e}")
+
+
+def get_request_stats() -> dict[str, int]:
+    """
+    Счётчики запросов к бирже для мониторинга: hits (ответ из локальных
+    данных), misses (запрос ушёл на биржу), coalesced (дождались чужого
+    такого же запроса) и in_flight.
+    """
+    return get_single_flight().stats()
+
+
 def get_ticker(symbol: str):
     """
     Возвращает всю информацию по менете.
+    В потоковом режиме — из буфера WebSocket, пока он не заполнен — через REST.
     """
-    try:
-        exchange = get_bybit_exchange()
-        ticker = exchange.fetch_ticker(symbol=symbol)
-        return ticker
+    stream = get_market_stream()
+    if stream is not None:
+        stream.subscribe(symbol)
+        ticker = stream.ticker(symbol)
+        if ticker is not None:
+            get_single_flight().record_hit()
+            return ticker
 
+    try:
+        return _fetch_ticker(symbol)
     except Exception as e:
         st.sidebar.warning(f"Не удалось получить цену {symbol}: {e}")
         return 0
 
 
-@st.cache_data(ttl=180)
+def get_ticker_age(symbol: str) -> float | None:
+    """
+    Возраст цены, которую вернёт get_ticker, в секундах.
+    """
+    stream = get_market_stream()
+    if stream is not None:
+        age = stream.ticker_age(symbol)
+        if age is not None:
+            return age
+    return _fetch_ticker.age(symbol)
+
+
+@swr_cache(ttl=60, grace=240)
+def _fetch_ticker(symbol: str):
+    exchange = get_bybit_exchange()
+    return exchange.fetch_ticker(symbol=symbol)
+
+
+def _ohlcv_window_start(exchange, timeframe: str, limit: int) -> int:
+    step = exchange.parse_timeframe(timeframe) * 1000
+    return exchange.milliseconds() - limit * step
+
+
+def _ohlcv_delta_since(exchange, store: CandleStore, timeframe: str, limit: int) -> int:
+    """
+    С какого момента запрашивать новые свечи: с последней сохранённой (она
+    могла быть незакрытой и будет перезаписана). Если хранилище кончается
+    раньше окна последних limit свечей, между ним и окном была бы дыра —
+    хранилище сбрасывается и загружается с начала окна.
+    """
+    window_start = _ohlcv_window_start(exchange, timeframe, limit)
+    last = store.last_timestamp
+    if last is not None and last < window_start:
+        store.reset()
+        last = None
+    if last is None:
+        return window_start
+    return last
+
+
+def _ohlcv_backfill_since(exchange, store: CandleStore, timeframe: str, limit: int) -> int | None:
+    """
+    С какого момента догрузить историю перед первой сохранённой свечой,
+    если хранилище короче limit свечей (например, увеличили «Свечей на
+    графике»). None — догружать нечего или биржа старше уже ничего не отдала.
+    """
+    window_start = _ohlcv_window_start(exchange, timeframe, limit)
+    first = store.first_timestamp
+    if first is None or first <= window_start:
+        return None
+    history_start = store.history_start
+    if history_start is not None and history_start <= window_start:
+        return None
+    return window_start
+
+
+def update_ohlcv_store(exchange, symbol: str, timeframe: str, limit: int = 156) -> CandleStore:
+    """
+    Догружает в локальное хранилище только свечи с момента последней
+    сохранённой (и, если хранилище короче limit, более старую историю).
+    В установившемся режиме это один запрос на 1–2 свечи.
+    Одновременные догрузки одного и того же набора из разных сессий
+    склеиваются в одну при любом limit: два обновления одного хранилища
+    не идут параллельно (reset одного не попадает посреди prepend другого).
+    Если склеились с догрузкой меньшего окна, своё окно догружается
+    следующим запросом.
+    """
+    key = ("fetch_ohlcv", symbol, timeframe)
+    store = get_single_flight().do(key, _update_ohlcv_store, exchange, symbol, timeframe, limit)
+    if _ohlcv_backfill_since(exchange, store, timeframe, limit) is not None:
+        store = get_single_flight().do(key, _update_ohlcv_store, exchange, symbol, timeframe, limit)
+    return store
+
+
+def _update_ohlcv_store(exchange, symbol: str, timeframe: str, limit: int) -> CandleStore:
+    store = open_candle_store(CANDLES_DIR, symbol, timeframe)
+
+    since = _ohlcv_backfill_since(exchange, store, timeframe, limit)
+    if since is not None:
+        history_start, first, older = since, store.first_timestamp, []
+        while since < first:
+            candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=OHLCV_PAGE_LIMIT)
+            older.extend(candles)
+            if len(candles) < OHLCV_PAGE_LIMIT:
+                break
+            since = candles[-1][0] + 1
+        store.prepend(older, history_start=history_start)
+
+    since = _ohlcv_delta_since(exchange, store, timeframe, limit)
+    while True:
+        candles = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=OHLCV_PAGE_LIMIT)
+        store.merge(candles)
+        if len(candles) < OHLCV_PAGE_LIMIT:
+            return store
+        since = candles[-1][0]
+
+
+async def update_ohlcv_store_async(exchange, symbol: str, timeframe: str, limit: int = 156) -> CandleStore:
+    key = ("fetch_ohlcv", symbol, timeframe)
+    store = await get_single_flight().do_async(key, _update_ohlcv_store_async, exchange, symbol, timeframe, limit)
+    if _ohlcv_backfill_since(exchange, store, timeframe, limit) is not None:
+        store = await get_single_flight().do_async(key, _update_ohlcv_store_async, exchange, symbol, timeframe, limit)
+    return store
+
+
+async def _update_ohlcv_store_async(exchange, symbol: str, timeframe: str, limit: int) -> CandleStore:
+    store = open_candle_store(CANDLES_DIR, symbol, timeframe)
+
+    since = _ohlcv_backfill_since(exchange, store, timeframe, limit)
+    if since is not None:
+        history_start, first, older = since, store.first_timestamp, []
+        while since < first:
+            candles = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=OHLCV_PAGE_LIMIT)
+            older.extend(candles)
+            if len(candles) < OHLCV_PAGE_LIMIT:
+                break
+            since = candles[-1][0] + 1
+        store.prepend(older, history_start=history_start)
+
+    since = _ohlcv_delta_since(exchange, store, timeframe, limit)
+    while True:
+        candles = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=OHLCV_PAGE_LIMIT)
+        store.merge(candles)
+        if len(candles) < OHLCV_PAGE_LIMIT:
+            return store
+        since = candles[-1][0]
+
+
+def _streamed_ohlcv(symbol: str, timeframe: str, limit: int) -> pd.DataFrame | None:
+    stream = get_market_stream()
+    if stream is None or timeframe not in KLINE_INTERVALS:
+        return None
+    stream.subscribe(symbol, [timeframe])
+    df = stream.candles(symbol, timeframe, limit)
+    if df is not None:
+        get_single_flight().record_hit()
+    return df
+
+
+def _seed_stream(symbol: str, timeframe: str, store: CandleStore, stream: MarketStream | None = None) -> None:
+    """
+    Передаёт историю из хранилища в буфер потока: дальше свечи
+    этого таймфрейма обновляются только из WebSocket.
+    """
+    if stream is None:
+        stream = get_market_stream()
+    if stream is None or timeframe not in KLINE_INTERVALS:
+        return
+    columns = store.read(tail=STREAM_BUFFER_SIZE)
+    candles = [
+        [int(ts), float(o), float(h), float(lo), float(c), float(v)]
+        for ts, o, h, lo, c, v in zip(*(columns[name] for name in OHLCV_COLUMNS))
+    ]
+    stream.seed(symbol, timeframe, candles)
+
+
 def fetch_ohlcv(symbol: str, timeframe: str, limit: int = 156):
-    try:
-        exchange = get_bybit_exchange()
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df = _streamed_ohlcv(symbol, timeframe, limit)
+    if df is not None:
         return df
+
+    try:
+        return _fetch_ohlcv_rest(symbol, timeframe, limit)
     except Exception as e:
         st.error(f"Не удалось получить данные fetch_ohlcv {symbol}: {e}")
         return None
 
 
+@swr_cache(ttl=180, grace=600)
+def _fetch_ohlcv_rest(symbol: str, timeframe: str, limit: int = 156):
+    exchange = get_bybit_exchange()
+    store = _update_ohlcv_store(exchange, symbol, timeframe, limit)
+    _seed_stream(symbol, timeframe, store)
+    return store.to_frame(tail=limit)
+
+
 async def fetch_ohlcv_async(exchange, symbol: str, timeframe: str, limit: int = 156):
-    try:
-        data = await exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-        df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df = _streamed_ohlcv(symbol, timeframe, limit)
+    if df is not None:
         return timeframe, df
+
+    try:
+        store = await update_ohlcv_store_async(exchange, symbol, timeframe, limit)
+        _seed_stream(symbol, timeframe, store)
+        return timeframe, store.to_frame(tail=limit)
     except Exception as e:
         st.error(f"Не удалось получить данные fetch_ohlcv_async {symbol}: {e}")
         return None
 
 
-async def get_ohlcv(symbol: str, timeframes: list):
-    exchange = get_bybit_async()
-    tasks = [fetch_ohlcv_async(exchange, symbol, tf) for tf in timeframes]
-    results = await asyncio.gather(*tasks)
-    await exchange.close()
-    return dict(results)
+async def get_ohlcv(symbol: str, timeframes: list, limit: int = 156):
+    """
+    Свечи по таймфреймам. 5m/15m/1h по возможности собираются из минутных
+    свечей (см. _plan_ohlcv_requests и load_page_data).
+    """
+    data, _ = await load_page_data(symbol, timeframes, ("ohlcv",), ohlcv_limit=limit)
+    return data["ohlcv"]
+
 
+def _plan_ohlcv_requests(
+    timeframes: list[str],
+    limit: int,
+    streaming: bool = STREAMING_ENABLED,
+) -> tuple[dict[str, int], list[str]]:
+    """
+    Какие таймфреймы запрашивать с биржи и сколько свечей, а какие
+    собрать локально из 1m. Для сборки минутная история должна покрывать
+    limit баров таймфрейма, поэтому собираются только те, кому хватает
+    DERIVED_MAX_1M_CANDLES минутных свечей (один запрос при холодном
+    старте, и 1m помещается в буфер потока).
+
+    В потоковом режиме ничего не собирается: сборка читает минутное
+    хранилище, которое обновляется только через REST, а каждый таймфрейм
+    и так приходит из WebSocket без запросов.
+    """
+    derived = []
+    if not streaming:
+        derived = [
+            tf for tf in timeframes
+            if tf in DERIVED_TIMEFRAMES
+            and limit * TIMEFRAME_MS[tf] // TIMEFRAME_MS["1m"] <= DERIVED_MAX_1M_CANDLES
+        ]
+    requests = {tf: limit for tf in timeframes if tf not in derived}
+    if derived:
+        lookback = limit * max(TIMEFRAME_MS[tf] for tf in derived) // TIMEFRAME_MS["1m"]
+        requests["1m"] = max(requests.get("1m", 0), lookback)
+    return requests, derived
+
+
+# symbol -> (ресемплер, первая минута и число минут хранилища при заполнении);
+# последние RESAMPLERS_MAXSIZE символов, самый давний вытесняется
+RESAMPLERS_MAXSIZE = 32
+_resamplers: OrderedDict[str, tuple[TimeframeResampler, int | None, int]] = OrderedDict()
+_resamplers_lock = threading.Lock()
+
+
+def derive_ohlcv_frames(
+    symbol: str,
+    timeframes: list[str],
+    limit: int = 156,
+) -> dict[str, pd.DataFrame]:
+    """
+    Бары старших таймфреймов из минутного хранилища symbol.
 
-@st.cache_data(ttl=60)
+    Ресемплер живёт между вызовами: в первый раз история строится
+    векторно, дальше в него подаются только новые минутные свечи
+    (и обновление последней), пересчитывается лишь открытый бар.
+    Если хранилище получило более старую историю (prepend) или было
+    сброшено (reset), ресемплер заполняется заново.
+    """
+    store = open_candle_store(CANDLES_DIR, symbol, "1m")
+    columns = store.read()
+    timestamps = columns["timestamp"]
+    first = int(timestamps[0]) if len(timestamps) else None
+
+    with _resamplers_lock:
+        resampler, seeded_first, seeded_length = _resamplers.get(symbol, (None, None, 0))
+        if (
+            resampler is None
+            or not set(timeframes) <= set(resampler.timeframes)
+            or first != seeded_first
+            or len(timestamps) < seeded_length
+        ):
+            resampler = TimeframeResampler(DERIVED_TIMEFRAMES)
+            resampler.seed(columns)
+        elif resampler.last_timestamp is not None:
+            start = np.searchsorted(timestamps, resampler.last_timestamp)
+            for row in zip(*(columns[name][start:] for name in OHLCV_COLUMNS)):
+                resampler.update([int(row[0]), *map(float, row[1:])])
+
+        _resamplers[symbol] = (resampler, first, len(timestamps))
+        _resamplers.move_to_end(symbol)
+        while len(_resamplers) > RESAMPLERS_MAXSIZE:
+            _resamplers.popitem(last=False)
+
+        return {tf: resampler.to_frame(tf, limit) for tf in timeframes}
+
+
+def _ticker_column(items: list[dict], field: str) -> np.ndarray:
+    """
+    Колонка чисел из списка тикеров: строки разбирает numpy одним
+    вызовом, пустые и отсутствующие значения становятся NaN.
+    """
+    values = [item.get(field) or "nan" for item in items]
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(np.float64)
+
+
+def tickers_frame(items: list[dict]) -> pd.DataFrame:
+    """
+    Строит таблицу рынков из result.list ответа /v5/market/tickers
+    по колонкам, без промежуточного словаря на каждый контракт.
+    Время фандинга форматируется один раз на каждое уникальное значение.
+    """
+    # Время фандинга у сотен контрактов совпадает — форматируем уникальные,
+    # пропуски (код -1) попадают на добавленный в конец None
+    codes, uniques = pd.factorize(_ticker_column(items, "nextFundingTime"))
+    formatted = (
+        pd.to_datetime(uniques, unit="ms", utc=True)
+        .tz_convert(tzlocal())
+        .strftime('%Y-%m-%d %H:%M')
+    )
+    next_funding_time = np.append(np.asarray(formatted, dtype=object), None).take(codes)
+
+    return pd.DataFrame({
+        'symbol': [item.get("symbol") for item in items],
+        'last_price': _ticker_column(items, "lastPrice"),
+        '24h_change': np.round(_ticker_column(items, "price24hPcnt") * 100, 2),
+        '24h_high': _ticker_column(items, "highPrice24h"),
+        '24h_low': _ticker_column(items, "lowPrice24h"),
+        'volume_24h_mln_usdt': np.round(_ticker_column(items, "turnover24h") / 1e6, 2),
+        'funding_rate': [item.get("fundingRate") for item in items],
+        'next_funding_time': next_funding_time,
+    })
+
+
+@swr_cache(ttl=60, grace=240, coalesce=False)
 def get_tickers():
     """
-    Получает тикеры через ccxt.fetch_tickers() и преобразует в DataFrame.
-    Фильтрует только фьючерсные контракты на USDT.
+    Получает тикеры напрямую из /v5/market/tickers?category=linear
+    (без нормализации каждого тикера в ccxt) и преобразует в DataFrame.
+    Запрос склеивается в BybitHttpClient, поэтому coalesce=False.
     https://bybit-exchange.github.io/docs/v5/market/tickers
     https://api.bybit.com/v5/market/tickers?category=linear
     """
-    exchange = get_bybit_exchange()
-    tickers = exchange.fetch_tickers()
-
-    data = []
-    for symbol, ticker in tickers.items():
-        symbol = ticker['info']['symbol']
-        last_price = float(ticker['info']['lastPrice'])
-        change_pct = float(ticker['info']['price24hPcnt']) * 100
-        high = float(ticker['info']['highPrice24h'])
-        low = float(ticker['info']['lowPrice24h'])
-        volume = float(ticker['info']['turnover24h']) / 1e6
-        funding_rate = ticker['info']['fundingRate']
-        next_funding_time = (
-            datetime
-            .fromtimestamp(int(ticker['info']['nextFundingTime']) / 1000)
-            .strftime('%Y-%m-%d %H:%M')
-        )
-
-        data.append({
-            'symbol': symbol,
-            'last_price': last_price,
-            '24h_change': round(change_pct, 2),
-            '24h_high': high,
-            '24h_low': low,
-            'volume_24h_mln_usdt': round(volume, 2),
-            'funding_rate': funding_rate,
-            'next_funding_time': next_funding_time
-        })
-
-    return pd.DataFrame(data)
+    payload = get_http_client().get_bytes_sync("/v5/market/tickers", {"category": "linear"})
+    items = json_loads(payload).get("result", {}).get("list", [])
+    return tickers_frame(items)
 
 
 
@@ -162,7 +627,6 @@ async def fetch_long_short_ratio(
     Запрашивает историю Long/Short Ratio для заданного symbol и period
     через Bybit REST API v5 и возвращает кортеж (period, DataFrame).
     """
-    url = "https://api.bybit.com/v5/market/account-ratio"
     params = {
         "category": "linear",
         "symbol": symbol,
@@ -170,10 +634,7 @@ async def fetch_long_short_ratio(
         "limit": limit,
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        js = resp.json()
+    js = await get_http_client().get("/v5/market/account-ratio", params)
 
     data = js.get("result", {}).get("list", [])
     if not data:
@@ -187,49 +648,62 @@ async def fetch_long_short_ratio(
     return period, df[["timestamp", "ratio"]]
 
 
-async def get_long_short_ratio(
-    symbol: str,
+def _periods_to_timeframes(
+    raw: dict[str, pd.DataFrame],
     periods: list[str],
-    limit: int = 156,
+    columns: list[str],
+    limit: int,
 ) -> dict[str, pd.DataFrame]:
     """
-    Запрашивает историю Long/Short Ratio для всех периодов из api_periods,
-    а затем возвращает словарь с ключами ['1d','1h','15m','5m','1m']:
-      - '15m' ← данные по '15min'
-      - '5m'  ← данные по '5min'
-      - '1m'  ← копия '5m', если нет своих данных
-      - '1h','1d' как есть
+    Переводит периоды API v5 в ключи таймфреймов графика:
+      - '15min' -> '15m', '5min' -> '5m', остальные — без изменений
+      - '1m' — ресемплинг '5m', если своих данных нет
     """
-    tasks = [
-        fetch_long_short_ratio(symbol, period, limit)
-        for period in periods
-    ]
-    results = await asyncio.gather(*tasks)
-
-    raw = {period: df for period, df in results}
     final = {}
     for p in periods:
-        # переводим '15min'->'15m', '5min'->'5m', остальные — без изменений
         if p.endswith("min"):
             key = p.replace("min", "m")
         else:
             key = p
-        final[key] = raw.get(p, pd.DataFrame(columns=["timestamp", "ratio"]))
+        final[key] = raw.get(p, pd.DataFrame(columns=columns))
 
     # если для '1m' фрейма нет данных или он пустой, копируем '5m'
-    if not final.get("1m") or final["1m"].empty:
-        df5 = final.get("5m", pd.DataFrame(columns=["timestamp", "ratio"])).copy()
+    if "1m" not in final or final["1m"].empty:
+        df5 = final.get("5m", pd.DataFrame(columns=columns)).copy()
 
         if not df5.empty:
             df5 = df5.set_index("timestamp").sort_index()
             df1 = df5.resample("1min").ffill().reset_index()
         else:
-            df1 = pd.DataFrame(columns=["timestamp", "ratio"])
+            df1 = pd.DataFrame(columns=columns)
         final["1m"] = df1.tail(limit).reset_index(drop=True)
 
     return final
 
 
+async def get_long_short_ratio(
+    symbol: str,
+    periods: list[str],
+    limit: int = 156,
+) -> dict[str, pd.DataFrame]:
+    """
+    Запрашивает историю Long/Short Ratio для всех периодов из api_periods,
+    а затем возвращает словарь с ключами ['1d','1h','15m','5m','1m']:
+      - '15m' ← данные по '15min'
+      - '5m'  ← данные по '5min'
+      - '1m'  ← копия '5m', если нет своих данных
+      - '1h','1d' как есть
+    """
+    tasks = [
+        fetch_long_short_ratio(symbol, period, limit)
+        for period in periods
+    ]
+    results = await asyncio.gather(*tasks)
+
+    raw = {period: df for period, df in results}
+    return _periods_to_timeframes(raw, periods, ["timestamp", "ratio"], limit)
+
+
 
 
 
@@ -253,7 +727,6 @@ async def fetch_open_interest(
     Запрашивает историю Open Interest для заданного symbol и period
     через Bybit REST API v5 и возвращает кортеж (period, DataFrame).
     """
-    url = "https://api.bybit.com/v5/market/open-interest"
     params = {
         "category": category,
         "symbol": symbol,
@@ -261,10 +734,7 @@ async def fetch_open_interest(
         "limit": limit,
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        js = resp.json()
+    js = await get_http_client().get("/v5/market/open-interest", params)
 
     data = js.get("result", {}).get("list", [])
     if not data:
@@ -294,24 +764,7 @@ async def get_open_interest(
     results = await asyncio.gather(*tasks)
 
     raw = {p: df for p, df in results}
-    final = {}
-    for p in periods:
-        if p.endswith("min"):
-            key = p.replace("min", "m")
-        else:
-            key = p
-        final[key] = raw.get(p, pd.DataFrame(columns=["timestamp", "openInterest"]))
-
-    if "1m" not in final or final["1m"].empty:
-        df5 = final.get("5m", pd.DataFrame(columns=["timestamp", "openInterest"]))
-        if not df5.empty:
-            df5 = df5.set_index("timestamp").sort_index()
-            df1 = df5.resample("1min").ffill().reset_index()
-        else:
-            df1 = pd.DataFrame(columns=["timestamp", "openInterest"])
-        final["1m"] = df1.tail(limit).reset_index(drop=True)
-
-    return final
+    return _periods_to_timeframes(raw, periods, ["timestamp", "openInterest"], limit)
 
 
 
@@ -362,7 +815,6 @@ def fetch_funding_history(
         A list of funding rate records.
     """
 
-    url = "https://api.bybit.com/v5/market/funding/history"
     params = {
         "category": category,
         "symbol": symbol,
@@ -372,16 +824,45 @@ def fetch_funding_history(
     }
 
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("result", {}).get("list", [])
+        data = get_http_client().get_sync("/v5/market/funding/history", params)
+        return data.get("result", {}).get("list", [])
     except httpx.HTTPError as exc:
-        print(f"HTTP error while fetching funding history {response}: {exc}")
+        print(f"HTTP error while fetching funding history {symbol}: {exc}")
         return []
 
 
+async def fetch_funding_history_async(
+    category: str,
+    symbol: str,
+    start_time: int,
+    end_time: int,
+    limit: int,
+) -> list:
+    """
+    Асинхронный вариант fetch_funding_history через общий HTTP-клиент.
+    """
+    params = {
+        "category": category,
+        "symbol": symbol,
+        "limit": limit,
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+
+    try:
+        data = await get_http_client().get("/v5/market/funding/history", params)
+        return data.get("result", {}).get("list", [])
+    except httpx.HTTPError as exc:
+        print(f"HTTP error while fetching funding history {symbol}: {exc}")
+        return []
+
+
+def _funding_window(limit: int) -> tuple[int, int]:
+    now = pd.Timestamp.utcnow()
+    start_time = now - timedelta(days=limit)
+    return int(start_time.timestamp() * 1000), int(now.timestamp() * 1000)
+
+
 def get_funding_history(
     symbol: str,
     timeframes: list[str],
@@ -432,10 +913,7 @@ def get_funding_history(
           - timestamp     datetime64[ns]
           - fundingRate   float (unmodified)
     """
-    now = pd.Timestamp.utcnow()
-    start_time = now - timedelta(days=limit)
-    start_ms = int(start_time.timestamp() * 1000)
-    end_ms = int(now.timestamp() * 1000)
+    start_ms, end_ms = _funding_window(limit)
 
     raw = fetch_funding_history(
         category="linear",
@@ -444,7 +922,18 @@ def get_funding_history(
         end_time=end_ms,
         limit=200,
     )
+    return build_funding_frames(raw, timeframes, limit)
 
+
+def build_funding_frames(
+    raw: list,
+    timeframes: list[str],
+    limit: int = 156,
+) -> dict[str, pd.DataFrame]:
+    """
+    Строит из записей /v5/market/funding/history фреймы по таймфреймам
+    (см. get_funding_history).
+    """
     df = pd.DataFrame(raw)
     if df.empty:
         return {tf: pd.DataFrame(columns=["timestamp", "fundingRate"]) for tf in timeframes}
@@ -491,3 +980,119 @@ def get_funding_history(
         indicators[tf] = df_out
 
     return indicators
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+# --- Page data orchestrator ---
+
+PAGE_DATASETS = ("ohlcv", "long_short_ratio", "open_interest", "funding_rate")
+
+
+async def load_page_data(
+    symbol: str,
+    timeframes: list[str],
+    datasets: tuple[str, ...] = ("ohlcv",),
+    periods: list[str] = ("1d", "1h", "15min", "5min"),
+    limit: int = 156,
+    max_concurrency: int = 8,
+    ohlcv_limit: int | None = None,
+) -> tuple[dict[str, dict[str, pd.DataFrame]], dict[str, str]]:
+    """
+    Загружает все данные страницы одним asyncio.gather.
+
+    Каждый запрос (OHLCV по таймфрейму, Long/Short Ratio и Open Interest
+    по периоду, история фандинга) — отдельная задача; одновременно
+    выполняется не больше max_concurrency. Задержка страницы равна
+    самому долгому запросу, а не сумме групп запросов.
+
+    ohlcv_limit — сколько свечей отдавать на график (по умолчанию limit);
+    свечи берутся из локального хранилища, с биржи догружается только хвост.
+    5m/15m/1h, когда это дешевле, собираются из 1m (см. _plan_ohlcv_requests).
+
+    Ошибка одного запроса не роняет остальные: соответствующий набор
+    остаётся пустым, а текст ошибки попадает во второй элемент результата.
+
+    Returns
+    -------
+    data : dict
+        dataset -> {timeframe: DataFrame}, datasets из PAGE_DATASETS.
+    errors : dict
+        dataset -> текст первой ошибки этого набора.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    ohlcv_limit = ohlcv_limit or limit
+    ohlcv_requests, derived = _plan_ohlcv_requests(timeframes, ohlcv_limit)
+
+    jobs = []
+    exchange = None
+    if "ohlcv" in datasets:
+        exchange = get_bybit_async()
+        for tf, tf_limit in ohlcv_requests.items():
+            jobs.append(("ohlcv", fetch_ohlcv_async(exchange, symbol, tf, tf_limit)))
+    if "long_short_ratio" in datasets:
+        for p in periods:
+            jobs.append(("long_short_ratio", fetch_long_short_ratio(symbol, p, limit)))
+    if "open_interest" in datasets:
+        for p in periods:
+            jobs.append(("open_interest", fetch_open_interest("linear", symbol, p, limit)))
+    if "funding_rate" in datasets:
+        start_ms, end_ms = _funding_window(limit)
+        jobs.append(("funding_rate", fetch_funding_history_async("linear", symbol, start_ms, end_ms, 200)))
+
+    try:
+        results = await asyncio.gather(
+            *(bounded(coro) for _, coro in jobs),
+            return_exceptions=True,
+        )
+    finally:
+        if exchange is not None:
+            await exchange.close()
+
+    raw = {dataset: {} for dataset in datasets}
+    errors = {}
+    for (dataset, _), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            errors.setdefault(dataset, str(result))
+        elif result is None:
+            errors.setdefault(dataset, "нет данных")
+        elif dataset == "funding_rate":
+            raw[dataset] = result
+        else:
+            key, df = result
+            raw[dataset][key] = df
+
+    data = {}
+    if "ohlcv" in datasets:
+        ohlcv = {tf: df.tail(ohlcv_limit).reset_index(drop=True) for tf, df in raw["ohlcv"].items()}
+        if derived and "1m" in raw["ohlcv"]:
+            ohlcv.update(derive_ohlcv_frames(symbol, derived, ohlcv_limit))
+        data["ohlcv"] = {tf: ohlcv[tf] for tf in timeframes if tf in ohlcv}
+    if "long_short_ratio" in datasets:
+        data["long_short_ratio"] = _periods_to_timeframes(
+            raw["long_short_ratio"], list(periods), ["timestamp", "ratio"], limit
+        )
+    if "open_interest" in datasets:
+        data["open_interest"] = _periods_to_timeframes(
+            raw["open_interest"], list(periods), ["timestamp", "openInterest"], limit
+        )
+    if "funding_rate" in datasets:
+        data["funding_rate"] = build_funding_frames(raw["funding_rate"], timeframes, limit)
+
+    return data, errors
@@ -0,0 +1,453 @@
+# flake8: noqa: E501
+"""
+Колоночный бинарный формат исторических свечей в datasets/.
+
+Набор данных — каталог datasets/<SYMBOL>/<timeframe>/:
+  meta.json        — версия, типы колонок, сжатие, число строк, размеры файлов;
+  <column>.bin     — сырой little-endian массив колонки (читается memmap);
+  <column>.bin.gz  — то же со сжатием gzip (каждая дозапись — отдельный член gzip).
+
+timestamp — int64 мс (UTC), цены — float64 или float32, объём — float64.
+meta.json переписывается атомарно после каждой записи и служит контрольной
+точкой: всё, что лежит в файлах колонок дальше записанных размеров, —
+недописанный хвост после сбоя, он обрезается при открытии на запись
+и игнорируется при чтении.
+
+generation в meta меняется при любой перезаписи середины набора (вставке
+догруженных пропусков), created_at — при создании набора заново. Вместе это
+версия уже записанных строк (dataset_version): пока она та же, производные
+данные (пирамида, индексы) можно дополнять только по новым строкам.
+
+Перевод старых CSV: python -m modules.dataset migrate [каталог] [--gzip] [--float32]
+"""
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.candle_store import OHLCV_COLUMNS
+from modules.resample import TIMEFRAME_MS
+
+
+DATASETS_DIR = Path("datasets")
+DATASET_VERSION = 1
+PRICE_COLUMNS = ("open", "high", "low", "close")
+COMPRESSIONS = (None, "gzip")
+
+
+def dataset_path(symbol: str, timeframe: str = "1m", root: Path = DATASETS_DIR) -> Path:
+    return Path(root) / symbol.replace("/", "").replace(":", "_") / timeframe
+
+
+def _column_dtypes(price_dtype: str) -> dict[str, np.dtype]:
+    dtypes = {name: np.dtype("<f8") for name in OHLCV_COLUMNS}
+    dtypes["timestamp"] = np.dtype("<i8")
+    for name in PRICE_COLUMNS:
+        dtypes[name] = np.dtype(price_dtype).newbyteorder("<")
+    return dtypes
+
+
+def _column_file(path: Path, name: str, compression: str | None) -> Path:
+    return path / (f"{name}.bin.gz" if compression == "gzip" else f"{name}.bin")
+
+
+def read_meta(path: Path) -> dict | None:
+    try:
+        with open(Path(path) / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != DATASET_VERSION:
+        return None
+    return meta
+
+
+def dataset_version(meta: dict) -> list:
+    """
+    Версия записанных строк: меняется, только если они могли измениться
+    (набор создан заново или в середину вставлены свечи), но не при дозаписи.
+    """
+    return [meta.get("created_at", 0), meta.get("generation", 0)]
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    target = path / "meta.json"
+    tmp_path = target.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    tmp_path.replace(target)
+
+
+class DatasetWriter:
+    """
+    Дозапись свечей в набор данных. Повторы и свечи не новее последней
+    сохранённой отбрасываются, поэтому пачки можно подавать внахлёст.
+
+    reset=True (или нет meta.json) — набор создаётся заново с указанными
+    price_dtype и compression, иначе берутся параметры существующего набора.
+    Дополнительные поля meta (symbol, start и т.п.) передаются через extra.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeframe: str,
+        price_dtype: str = "float64",
+        compression: str | None = None,
+        reset: bool = False,
+        **extra,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta = None if reset else read_meta(self.path)
+
+        if meta is None:
+            dtypes = _column_dtypes(price_dtype)
+            meta = {
+                "version": DATASET_VERSION,
+                "timeframe": timeframe,
+                "compression": compression,
+                "columns": {name: dtype.str for name, dtype in dtypes.items()},
+                "rows": 0,
+                "created_at": time.time_ns(),
+                "generation": 0,
+                "first_timestamp": None,
+                "last_timestamp": None,
+                "sizes": {name: 0 for name in OHLCV_COLUMNS},
+            }
+            for name in OHLCV_COLUMNS:
+                for stale in (_column_file(self.path, name, None), _column_file(self.path, name, "gzip")):
+                    stale.unlink(missing_ok=True)
+
+        meta.update(extra)
+        self.meta = meta
+        self._dtypes = {name: np.dtype(dtype) for name, dtype in meta["columns"].items()}
+
+        # Хвост после последней контрольной точки — недописанная пачка
+        for name in OHLCV_COLUMNS:
+            column_path = _column_file(self.path, name, meta["compression"])
+            with open(column_path, "ab") as f:
+                f.truncate(meta["sizes"][name])
+        _write_meta(self.path, meta)
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return self.meta["last_timestamp"]
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    def append(self, candles) -> int:
+        """
+        Дописывает свечи ccxt ([timestamp, open, high, low, close, volume]).
+        Возвращает число добавленных строк.
+        """
+        if not len(candles):
+            return 0
+
+        data = np.asarray(candles, dtype=np.float64)
+        timestamps = data[:, 0].astype(np.int64)
+        timestamps, first = np.unique(timestamps, return_index=True)
+        data = data[first]
+        if self.last_timestamp is not None:
+            newer = timestamps > self.last_timestamp
+            data, timestamps = data[newer], timestamps[newer]
+        if not len(data):
+            return 0
+
+        meta = self.meta
+        for i, name in enumerate(OHLCV_COLUMNS):
+            values = timestamps if name == "timestamp" else data[:, i]
+            payload = np.ascontiguousarray(values, dtype=self._dtypes[name]).tobytes()
+            if meta["compression"] == "gzip":
+                payload = gzip.compress(payload, compresslevel=6)
+            with open(_column_file(self.path, name, meta["compression"]), "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            meta["sizes"][name] += len(payload)
+
+        if meta["first_timestamp"] is None:
+            meta["first_timestamp"] = int(timestamps[0])
+        meta["last_timestamp"] = int(timestamps[-1])
+        meta["rows"] += len(data)
+        _write_meta(self.path, meta)
+        return len(data)
+
+
+def read_dataset(path: Path, columns=OHLCV_COLUMNS) -> dict[str, np.ndarray]:
+    """
+    Колонки набора данных. Без сжатия — memmap только для чтения (данные
+    подгружаются с диска по мере обращения), со сжатием — массивы в памяти.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+
+    rows = meta["rows"]
+    result = {}
+    for name in columns:
+        dtype = np.dtype(meta["columns"][name])
+        column_path = _column_file(path, name, meta["compression"])
+        if not rows:
+            result[name] = np.empty(0, dtype=dtype)
+        elif meta["compression"] == "gzip":
+            with open(column_path, "rb") as f:
+                raw = gzip.decompress(f.read(meta["sizes"][name]))
+            result[name] = np.frombuffer(raw, dtype=dtype, count=rows)
+        else:
+            result[name] = np.memmap(column_path, dtype=dtype, mode="r", shape=(rows,))
+    return result
+
+
+def iter_dataset_chunks(path: Path, chunk_rows: int = 1_000_000, columns=OHLCV_COLUMNS):
+    """
+    Колонки набора данных кусками по chunk_rows строк (последний — короче).
+    Без сжатия — срезы memmap, со сжатием — последовательная распаковка:
+    в памяти всегда не больше одного куска.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+
+    rows = meta["rows"]
+    if meta["compression"] != "gzip":
+        mapped = read_dataset(path, columns)
+        for start in range(0, rows, chunk_rows):
+            yield {name: mapped[name][start:start + chunk_rows] for name in columns}
+        return
+
+    dtypes = {name: np.dtype(meta["columns"][name]) for name in columns}
+    streams = {name: gzip.open(_column_file(path, name, "gzip"), "rb") for name in columns}
+    try:
+        for start in range(0, rows, chunk_rows):
+            count = min(chunk_rows, rows - start)
+            yield {
+                name: np.frombuffer(streams[name].read(count * dtypes[name].itemsize), dtype=dtypes[name], count=count)
+                for name in columns
+            }
+    finally:
+        for stream in streams.values():
+            stream.close()
+
+
+def available_symbols(root: Path = DATASETS_DIR, timeframe: str = "1m") -> list[str]:
+    """
+    Символы, для которых скачаны данные: наборы данных и CSV старого формата.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    symbols = {path.stem for path in root.glob("*.csv")}
+    symbols.update(
+        path.name for path in root.iterdir()
+        if path.is_dir() and read_meta(path / timeframe) is not None
+    )
+    return sorted(symbols)
+
+
+def load_dataset_frame(path: Path) -> pd.DataFrame:
+    """
+    Набор данных как DataFrame с колонкой timestamp в datetime, как у CSV.
+    """
+    columns = read_dataset(path)
+    df = pd.DataFrame({name: np.asarray(columns[name]) for name in OHLCV_COLUMNS})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def load_symbol_frame(symbol: str, timeframe: str = "1m", root: Path = DATASETS_DIR) -> pd.DataFrame | None:
+    """
+    Набор данных символа как DataFrame или None, если его нет. Если
+    остался только CSV старого формата (datasets/<SYMBOL>.csv), он один
+    раз переводится в набор данных.
+    """
+    path = dataset_path(symbol, timeframe, root)
+    csv_path = Path(root) / f"{symbol}.csv"
+    if read_meta(path) is None:
+        if timeframe != "1m" or not csv_path.exists():
+            return None
+        convert_csv(csv_path, path)
+    return load_dataset_frame(path)
+
+
+def dataset_snapshot(symbol: str, timeframe: str = "1m", root: Path = DATASETS_DIR) -> tuple | None:
+    """
+    Версия и число строк набора символа на диске или None, если набора
+    нет. Ключ кеша для таблиц, прочитанных через load_symbol_frame:
+    после дозагрузки или вставки пропусков они перечитываются.
+    """
+    meta = read_meta(dataset_path(symbol, timeframe, root))
+    if meta is None:
+        return None
+    return (*dataset_version(meta), meta["rows"])
+
+
+def find_gaps(timestamps: np.ndarray, step: int) -> np.ndarray:
+    """
+    Пропуски во временном ряду: массив (k, 2) полуинтервалов
+    [начало, конец) отсутствующих свечей, в мс.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if len(timestamps) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    holes = np.flatnonzero(np.diff(timestamps) > step)
+    return np.column_stack((timestamps[holes] + step, timestamps[holes + 1]))
+
+
+def scan_gaps(path: Path) -> np.ndarray:
+    """
+    Пропуски в наборе данных с учётом индекса в meta.json: повторно
+    просматривается только хвост, добавленный после прошлой проверки
+    (индекс сбрасывается при смене dataset_version). Диапазоны, которые
+    биржа уже не смогла отдать (unfillable_gaps), не возвращаются.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+
+    step = TIMEFRAME_MS[meta["timeframe"]]
+    version = dataset_version(meta)
+    index = meta.get("gap_index")
+    if index is None or index.get("version") != version or index["rows"] > meta["rows"]:
+        index = {"version": version, "rows": 0, "gaps": []}
+
+    # meta.json переписывается, только если появились непроверенные строки
+    if index["rows"] != meta["rows"] or meta.get("gap_index") != index:
+        # Последняя проверенная строка входит в хвост: пропуск мог начаться сразу за ней
+        timestamps = read_dataset(path, columns=("timestamp",))["timestamp"]
+        tail = timestamps[max(index["rows"] - 1, 0):]
+        index["gaps"].extend(find_gaps(tail, step).tolist())
+        index["rows"] = meta["rows"]
+        meta["gap_index"] = index
+        _write_meta(path, meta)
+
+    unfillable = {tuple(gap) for gap in meta.get("unfillable_gaps", [])}
+    gaps = [gap for gap in index["gaps"] if tuple(gap) not in unfillable]
+    return np.asarray(gaps, dtype=np.int64).reshape(-1, 2)
+
+
+def splice_candles(path: Path, candles, unfillable_gaps=(), chunk_rows: int = 1_000_000) -> int:
+    """
+    Вставляет свечи в середину набора данных (догруженные пропуски):
+    набор переписывается во временный каталог с теми же типами и сжатием
+    и подменяет исходный, generation увеличивается. Свечи с уже
+    имеющимися метками времени пропускаются.
+
+    unfillable_gaps — диапазоны, для которых биржа ничего не вернула;
+    они запоминаются и больше не считаются пропусками.
+    Возвращает число вставленных строк.
+    """
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+
+    data = np.asarray(candles, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+    new_ts, first = np.unique(data[:, 0].astype(np.int64), return_index=True)
+    data = data[first]
+
+    columns = read_dataset(path)
+    timestamps = columns["timestamp"]
+    positions = np.searchsorted(timestamps, new_ts)
+    exists = positions < len(timestamps)
+    exists[exists] = timestamps[positions[exists]] == new_ts[exists]
+    positions, data = positions[~exists], data[~exists]
+
+    merged = np.empty((meta["rows"] + len(data), len(OHLCV_COLUMNS)), dtype=np.float64)
+    for i, name in enumerate(OHLCV_COLUMNS):
+        merged[:, i] = np.insert(np.asarray(columns[name], dtype=np.float64), positions, data[:, i])
+    del columns, timestamps
+
+    extra = {
+        key: value for key, value in meta.items()
+        if key not in ("version", "timeframe", "compression", "columns", "rows", "created_at", "generation",
+                       "first_timestamp", "last_timestamp", "sizes", "gap_index")
+    }
+    extra["unfillable_gaps"] = [*meta.get("unfillable_gaps", []), *map(list, unfillable_gaps)]
+
+    tmp_path = path.with_name(path.name + ".splice")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    extra["generation"] = meta.get("generation", 0) + 1
+    writer = DatasetWriter(
+        tmp_path, meta["timeframe"], reset=True,
+        price_dtype=np.dtype(meta["columns"]["open"]).name,
+        compression=meta["compression"],
+        **extra,
+    )
+    for start in range(0, len(merged), chunk_rows):
+        writer.append(merged[start:start + chunk_rows])
+
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(old_path, ignore_errors=True)
+    path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path)
+    return len(data)
+
+
+def convert_csv(
+    csv_path: Path,
+    path: Path,
+    timeframe: str = "1m",
+    price_dtype: str = "float64",
+    compression: str | None = None,
+    chunksize: int = 500_000,
+) -> int:
+    """
+    Переводит CSV старого формата (timestamp как дата, OHLCV) в набор
+    данных. Читает по частям, память не зависит от размера файла.
+    Возвращает число строк в наборе.
+    """
+    writer = DatasetWriter(
+        path, timeframe, price_dtype=price_dtype, compression=compression, reset=True,
+        symbol=Path(csv_path).stem,
+    )
+    # Старый загрузчик сортировал и удалял повторы перед записью,
+    # так что части идут по возрастанию времени
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        data = np.empty((len(chunk), len(OHLCV_COLUMNS)), dtype=np.float64)
+        data[:, 0] = pd.to_datetime(chunk["timestamp"]).to_numpy().astype("datetime64[ms]").astype(np.int64)
+        data[:, 1:] = chunk[list(OHLCV_COLUMNS[1:])].to_numpy(dtype=np.float64)
+        writer.append(data)
+    return len(writer)
+
+
+def migrate_directory(root: Path = DATASETS_DIR, **options) -> list[tuple[str, int]]:
+    """
+    Переводит все datasets/<SYMBOL>.csv в наборы данных datasets/<SYMBOL>/1m.
+    CSV остаются на месте.
+    """
+    converted = []
+    for csv_path in sorted(Path(root).glob("*.csv")):
+        rows = convert_csv(csv_path, dataset_path(csv_path.stem, "1m", root), **options)
+        converted.append((csv_path.stem, rows))
+    return converted
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "migrate":
+        print(__doc__)
+        sys.exit(1)
+
+    flags = {arg for arg in args[1:] if arg.startswith("--")}
+    paths = [arg for arg in args[1:] if not arg.startswith("--")]
+    options = {
+        "compression": "gzip" if "--gzip" in flags else None,
+        "price_dtype": "float32" if "--float32" in flags else "float64",
+    }
+    for symbol, rows in migrate_directory(Path(paths[0]) if paths else DATASETS_DIR, **options):
+        print(f"{symbol}: {rows} строк")
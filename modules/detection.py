@@ -0,0 +1,60 @@
+"""
+Поиск точек роста цены на исторических свечах.
+
+Оба этапа векторные: превышение SMA — булева маска по скользящему среднему
+из кумулятивной суммы, фильтр «не чаще раза в cooldown свечей» — прыжки
+searchsorted по отсортированным индексам (итераций столько, сколько точек
+останется, а не сколько найдено).
+"""
+import numpy as np
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Скользящее среднее за window значений; первые window - 1 — NaN,
+    как у pandas rolling(window).mean().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if window < 1 or len(values) < window:
+        return result
+
+    # Сдвиг на первое значение уменьшает накопленную ошибку кумулятивной суммы
+    shifted = values - values[0]
+    csum = np.concatenate(([0.0], np.cumsum(shifted)))
+    result[window - 1:] = (csum[window:] - csum[:-window]) / window + values[0]
+    return result
+
+
+def sma_breakouts(close: np.ndarray, window: int, threshold_pct: float) -> np.ndarray:
+    """
+    Индексы свечей, где close выше SMA(window) больше чем на threshold_pct %.
+    Как и прежний цикл, проверка начинается с индекса window.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    sma = rolling_mean(close, window)
+    mask = close > sma * (1 + threshold_pct / 100)
+    mask[:window] = False
+    return np.flatnonzero(mask)
+
+
+def cooldown_filter(indices: np.ndarray, cooldown: int) -> np.ndarray:
+    """
+    Оставляет точку, только если она дальше cooldown свечей от предыдущей
+    оставленной. indices — по возрастанию.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    kept = []
+    position = 0
+    while position < len(indices):
+        current = indices[position]
+        kept.append(current)
+        position = np.searchsorted(indices, current + cooldown, side="right")
+    return np.asarray(kept, dtype=np.int64)
+
+
+def find_growth_points(close: np.ndarray, window: int, threshold_pct: float, cooldown: int = 100) -> np.ndarray:
+    """
+    Точки роста для страницы Entry point: превышения SMA, прореженные cooldown.
+    """
+    return cooldown_filter(sma_breakouts(close, window, threshold_pct), cooldown)
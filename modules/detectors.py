@@ -0,0 +1,265 @@
+# flake8: noqa: E501
+"""
+Потоковые детекторы всплесков на скользящих статистиках.
+
+Каждый детектор получает свечи по одной (timestamp, open, high, low, close,
+volume — как у ccxt) и держит состояние фиксированного размера: бегущие
+суммы, кольцевой буфер окна, экспоненциальные средние. Поэтому один и тот же
+код работает и на живых свечах (update), и на истории (scan — кусками любого
+размера, состояние переходит из куска в кусок), а проход по набору данных
+любого размера через scan_dataset занимает постоянную память.
+
+update(candle, closed=False) только проверяет ещё не закрытую свечу и не
+меняет состояние — так можно подсвечивать текущий бар, а закрытая свеча
+потом придёт снова с closed=True.
+
+Каждый детектор перечисляет в columns колонки, которые читает: при проходе
+по истории в строки свечей превращаются только они, один раз на кусок
+для всех детекторов сразу (остальные поля строки — None).
+
+После каждого update в value лежит величина, с которой сравнивается порог
+(превышение SMA в %, z-оценка объёма, просадка в %, отношение ATR).
+"""
+import math
+from collections import deque
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+
+from modules.candle_store import OHLCV_COLUMNS
+from modules.dataset import iter_dataset_chunks
+
+
+def candle_rows(columns: dict, names) -> list[tuple]:
+    """
+    Строки свечей (timestamp, open, high, low, close, volume) из куска
+    колонок; в Python-числа переводятся только колонки names.
+    """
+    length = len(next(iter(columns.values())))
+    values = [
+        np.asarray(columns[name]).tolist() if name in names else repeat(None, length)
+        for name in OHLCV_COLUMNS
+    ]
+    return list(zip(*values))
+
+
+class StreamingDetector:
+    name = "detector"
+    columns: tuple[str, ...] = OHLCV_COLUMNS
+
+    def __init__(self):
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, candle, closed: bool = True) -> bool:
+        """
+        Обрабатывает свечу и возвращает True, если она — всплеск.
+        """
+        raise NotImplementedError("Метод update() должен быть реализован в подклассе.")
+
+    def scan(self, columns: dict, offset: int = 0) -> np.ndarray:
+        """
+        Прогоняет через update кусок колонок (как у read_dataset)
+        и возвращает индексы сработавших свечей, сдвинутые на offset.
+        """
+        return self.scan_rows(candle_rows(columns, self.columns), offset)
+
+    def scan_rows(self, rows: list[tuple], offset: int = 0) -> np.ndarray:
+        """
+        То же для уже готовых строк свечей (см. candle_rows).
+        """
+        update = self.update
+        hits = [i for i, candle in enumerate(rows) if update(candle)]
+        return np.asarray(hits, dtype=np.int64) + offset
+
+
+class SMABreakout(StreamingDetector):
+    """
+    close выше SMA(window) больше чем на threshold_pct %. Совпадает
+    с modules.detection.sma_breakouts: SMA включает текущую свечу,
+    проверка начинается с индекса window.
+    """
+    name = "sma_breakout"
+    columns = ("close",)
+
+    def __init__(self, window: int, threshold_pct: float):
+        super().__init__()
+        self.window = window
+        self.factor = 1 + threshold_pct / 100
+        self.closes = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, candle, closed: bool = True) -> bool:
+        close = float(candle[4])
+        dropped = self.closes[0] if len(self.closes) == self.window else 0.0
+        total = self.total + close - dropped
+        count = self.count + 1
+
+        if closed:
+            self.closes.append(close)
+            self.total, self.count = total, count
+            if count % self.window == 0:
+                # Раз в окно сумма пересчитывается заново — ошибка округления не копится
+                self.total = math.fsum(self.closes)
+
+        if count <= self.window:
+            self.value = math.nan
+            return False
+        sma = total / self.window
+        self.value = (close / sma - 1) * 100
+        return close > sma * self.factor
+
+
+class VolumeZScore(StreamingDetector):
+    """
+    Объём свечи больше среднего за предыдущие window свечей на z
+    стандартных отклонений. Среднее и дисперсия — из бегущих сумм
+    объёмов и их квадратов.
+    """
+    name = "volume_zscore"
+    columns = ("volume",)
+
+    def __init__(self, window: int = 100, z: float = 3.0):
+        super().__init__()
+        self.window = window
+        self.z = z
+        self.volumes = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, candle, closed: bool = True) -> bool:
+        volume = float(candle[5])
+        volumes, window = self.volumes, self.window
+        full = len(volumes) == window
+        fired = False
+        self.value = math.nan
+        if full:
+            mean = self.total / window
+            variance = self.total_sq / window - mean * mean
+            if variance > 0:
+                self.value = (volume - mean) / math.sqrt(variance)
+                fired = self.value > self.z
+
+        if closed:
+            dropped = volumes[0] if full else 0.0
+            volumes.append(volume)
+            self.total += volume - dropped
+            self.total_sq += volume * volume - dropped * dropped
+            self.count += 1
+            if self.count % window == 0:
+                # Раз в окно суммы пересчитываются заново — ошибка округления не копится
+                self.total = math.fsum(volumes)
+                self.total_sq = math.fsum(v * v for v in volumes)
+        return fired
+
+
+class DrawdownFromMax(StreamingDetector):
+    """
+    close ниже максимума high за последние window свечей (включая текущую)
+    больше чем на threshold_pct %. window=None — от максимума за всю
+    историю. Максимум окна — монотонная очередь: амортизированно O(1)
+    на свечу.
+    """
+    name = "drawdown"
+    columns = ("high", "close")
+
+    def __init__(self, threshold_pct: float, window: int | None = None):
+        super().__init__()
+        self.window = window
+        self.factor = 1 - threshold_pct / 100
+        self.maxima = deque()  # (номер свечи, high) по убыванию high
+
+    def update(self, candle, closed: bool = True) -> bool:
+        high, close = float(candle[2]), float(candle[4])
+        index = self.count
+        maxima = self.maxima
+        if closed:
+            while maxima and maxima[-1][1] <= high:
+                maxima.pop()
+            maxima.append((index, high))
+            if self.window is not None and maxima[0][0] <= index - self.window:
+                maxima.popleft()
+            self.count += 1
+            peak = maxima[0][1]
+        else:
+            peak = high
+            for i, value in maxima:
+                if self.window is None or i > index - self.window:
+                    peak = max(peak, value)
+                    break
+
+        if peak <= 0:
+            self.value = math.nan
+            return False
+        self.value = (1 - close / peak) * 100
+        return close < peak * self.factor
+
+
+class ATRExpansion(StreamingDetector):
+    """
+    Быстрый ATR больше медленного в ratio раз — волатильность резко
+    выросла. Оба ATR — сглаживание Уайлдера, начиная с первого true range;
+    сигналы — после slow свечей.
+    """
+    name = "atr_expansion"
+    columns = ("high", "low", "close")
+
+    def __init__(self, fast: int = 14, slow: int = 100, ratio: float = 2.0):
+        super().__init__()
+        self.fast = fast
+        self.slow = slow
+        self.ratio = ratio
+        self.prev_close = None
+        self.atr_fast = 0.0
+        self.atr_slow = 0.0
+
+    def update(self, candle, closed: bool = True) -> bool:
+        high, low, close = float(candle[2]), float(candle[3]), float(candle[4])
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+
+        if self.count:
+            atr_fast = self.atr_fast + (true_range - self.atr_fast) / self.fast
+            atr_slow = self.atr_slow + (true_range - self.atr_slow) / self.slow
+        else:
+            atr_fast = atr_slow = true_range
+        count = self.count + 1
+
+        if closed:
+            self.atr_fast, self.atr_slow = atr_fast, atr_slow
+            self.prev_close = close
+            self.count = count
+
+        if count < self.slow or atr_slow <= 0:
+            self.value = math.nan
+            return False
+        self.value = atr_fast / atr_slow
+        return self.value > self.ratio
+
+
+def scan_dataset(path: Path, detectors: list[StreamingDetector], chunk_rows: int = 1_000_000) -> list[np.ndarray]:
+    """
+    Проход детекторов по набору данных кусками по chunk_rows строк.
+    В памяти — один кусок колонок, его строки (общие для всех детекторов)
+    и состояния детекторов. Возвращает индексы срабатываний каждого
+    детектора в порядке detectors — детекторы одного класса с разными
+    параметрами не смешиваются.
+    """
+    if not detectors:
+        return []
+    names = {name for detector in detectors for name in detector.columns}
+    columns = [name for name in OHLCV_COLUMNS if name in names]
+    hits = [[] for _ in detectors]
+    offset = 0
+    for chunk in iter_dataset_chunks(path, chunk_rows, columns=columns):
+        rows = candle_rows(chunk, names)
+        for detector, parts in zip(detectors, hits):
+            parts.append(detector.scan_rows(rows, offset))
+        offset += len(rows)
+        del rows
+    return [
+        np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        for parts in hits
+    ]
@@ -0,0 +1,298 @@
+# flake8: noqa: E501
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator
+
+import numpy as np
+
+from modules.dataset import DatasetWriter, find_gaps, read_meta, scan_gaps, splice_candles
+from modules.resample import TIMEFRAME_MS
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов для asyncio: rate токенов в секунду,
+    не больше capacity подряд. Один экземпляр на все параллельные
+    задачи загрузки — суммарная частота не превышает rate.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+def iter_shards(start_ms: int, end_ms: int, step_ms: int, limit: int) -> Iterator[tuple[int, int]]:
+    """
+    Делит [start_ms, end_ms) на отрезки по limit свечей — ровно один
+    запрос к бирже на отрезок. Начало выравнивается по границе свечи.
+    """
+    start = -(-start_ms // step_ms) * step_ms
+    span = step_ms * limit
+    for shard_start in range(start, end_ms, span):
+        yield shard_start, min(shard_start + span, end_ms)
+
+
+async def fetch_shard(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    shard: tuple[int, int],
+    limit: int,
+    bucket: TokenBucket,
+    stats: dict,
+    retries: int = 5,
+    backoff: float = 1.0,
+) -> list[list]:
+    """
+    Свечи отрезка [start, end). Обычно это один запрос; если биржа
+    вернула меньше, догружает отрезок дальше. Ошибки повторяются
+    с экспоненциальной паузой, после retries попыток поднимаются.
+    """
+    start, end = shard
+    step = TIMEFRAME_MS[timeframe]
+    result = []
+    since = start
+    attempt = 0
+    while since < end:
+        await bucket.acquire()
+        try:
+            candles = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        except Exception:
+            attempt += 1
+            if attempt > retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+            continue
+
+        stats["requests"] += 1
+        candles = [c for c in candles if since <= c[0] < end]
+        if not candles:
+            break
+        result.extend(candles)
+        since = candles[-1][0] + step
+    return result
+
+
+async def iter_ohlcv_batches(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    start_ms: int,
+    end_ms: int,
+    limit: int = 1000,
+    concurrency: int = 8,
+    bucket: TokenBucket | None = None,
+    stats: dict | None = None,
+) -> AsyncIterator[list[list]]:
+    """
+    Загружает отрезки параллельно (не больше concurrency запросов
+    одновременно) и отдаёт их строго по порядку времени.
+    Вперёд запускается не больше 2 × concurrency отрезков, поэтому
+    память не зависит от длины диапазона.
+    """
+    shards = iter_shards(start_ms, end_ms, TIMEFRAME_MS[timeframe], limit)
+    async for _, candles in _iter_shard_batches(
+        exchange, symbol, timeframe, shards, limit, concurrency, bucket, stats,
+    ):
+        yield candles
+
+
+async def _iter_shard_batches(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    shards: Iterator[tuple[int, int]],
+    limit: int,
+    concurrency: int,
+    bucket: TokenBucket | None = None,
+    stats: dict | None = None,
+) -> AsyncIterator[tuple[tuple[int, int], list[list]]]:
+    """
+    Параллельная загрузка произвольной последовательности отрезков
+    (см. iter_ohlcv_batches): отдаёт пары (отрезок, свечи) в порядке shards.
+    """
+    if bucket is None:
+        bucket = TokenBucket(rate=1000 / exchange.rateLimit, capacity=concurrency)
+    if stats is None:
+        stats = {"requests": 0}
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(shard):
+        async with semaphore:
+            return await fetch_shard(exchange, symbol, timeframe, shard, limit, bucket, stats)
+
+    pending = deque()
+
+    def schedule() -> None:
+        shard = next(shards, None)
+        if shard is not None:
+            pending.append((shard, asyncio.ensure_future(run(shard))))
+
+    try:
+        for _ in range(2 * concurrency):
+            schedule()
+        while pending:
+            shard, task = pending.popleft()
+            candles = await task
+            schedule()
+            yield shard, candles
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+async def download_ohlcv_to_dataset(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    start_ms: int,
+    end_ms: int,
+    path: Path,
+    limit: int = 1000,
+    concurrency: int = 8,
+    on_batch: Callable[[list, dict], None] | None = None,
+    price_dtype: str = "float64",
+    compression: str | None = None,
+) -> dict:
+    """
+    Загружает свечи прямо в набор данных (modules.dataset): каждый отрезок
+    дописывается на диск по мере поступления, meta.json после записи
+    служит контрольной точкой. Память не зависит от длины диапазона.
+
+    Повторный запуск продолжает с контрольной точки: недописанный при
+    сбое хвост обрезается, свечи не новее последней сохранённой
+    отбрасываются. Завершённый набор так же дописывается новыми свечами
+    до end_ms. Другой символ, таймфрейм или более раннее начало — набор
+    создаётся заново.
+
+    end_ms ограничивается последней закрытой свечой: незакрытая попала бы
+    в набор с неполными OHLCV, а продолжение начинается после последней
+    сохранённой и её уже не перепишет.
+
+    Возвращает статистику загрузки (requests, candles, seconds,
+    candles_per_s) плюс rows, first_timestamp, last_timestamp (мс) по
+    всему набору и resumed.
+    """
+    step = TIMEFRAME_MS[timeframe]
+    start_ms = -(-start_ms // step) * step
+    end_ms = min(end_ms, exchange.milliseconds() // step * step)
+
+    meta = read_meta(path)
+    resumed = (
+        meta is not None
+        and meta.get("symbol") == symbol
+        and meta.get("timeframe") == timeframe
+        and meta.get("start", float("inf")) <= start_ms
+    )
+    writer = DatasetWriter(
+        path, timeframe, price_dtype=price_dtype, compression=compression, reset=not resumed,
+        symbol=symbol, start=meta["start"] if resumed else start_ms,
+    )
+    last = writer.last_timestamp
+    since = start_ms if last is None else max(start_ms, last + step)
+
+    stats = {"requests": 0, "candles": 0, "seconds": 0.0, "candles_per_s": 0.0}
+    started = time.perf_counter()
+    async for candles in iter_ohlcv_batches(
+        exchange, symbol, timeframe, since, end_ms, limit, concurrency, stats=stats,
+    ):
+        # Стык с уже сохранёнными данными: повторы отбрасывает writer
+        added = writer.append(candles)
+
+        stats["candles"] += added
+        stats["seconds"] = time.perf_counter() - started
+        stats["candles_per_s"] = stats["candles"] / stats["seconds"] if stats["seconds"] else 0.0
+        if on_batch is not None:
+            on_batch(candles, stats)
+
+    return {
+        **stats,
+        "rows": len(writer),
+        "first_timestamp": writer.meta["first_timestamp"],
+        "last_timestamp": writer.meta["last_timestamp"],
+        "resumed": resumed,
+    }
+
+
+async def backfill_gaps(
+    exchange,
+    symbol: str,
+    path: Path,
+    limit: int = 1000,
+    concurrency: int = 8,
+    on_batch: Callable[[list, dict], None] | None = None,
+) -> dict:
+    """
+    Догружает только пропуски набора данных (см. scan_gaps) и вставляет
+    их на место одной перезаписью. Отрезки всех пропусков загружаются
+    вместе — параллельно, не больше concurrency запросов, с общим
+    ограничителем частоты. Части пропусков, за которые биржа ничего не
+    вернула (например, техработы), запоминаются и больше не запрашиваются.
+
+    Возвращает статистику: gaps, missing (свечей в пропусках), filled,
+    unfillable (диапазонов без данных), requests, seconds.
+    """
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Нет набора данных в {path}")
+    timeframe = meta["timeframe"]
+    step = TIMEFRAME_MS[timeframe]
+
+    gaps = scan_gaps(path)
+    stats = {
+        "gaps": len(gaps),
+        "missing": int(((gaps[:, 1] - gaps[:, 0]) // step).sum()),
+        "filled": 0,
+        "unfillable": 0,
+        "requests": 0,
+        "seconds": 0.0,
+    }
+    if not len(gaps):
+        return stats
+
+    started = time.perf_counter()
+    bucket = TokenBucket(rate=1000 / exchange.rateLimit, capacity=concurrency)
+    shards = (
+        shard
+        for gap_start, gap_end in gaps.tolist()
+        for shard in iter_shards(gap_start, gap_end, step, limit)
+    )
+    fetched = []
+    received = [[] for _ in range(len(gaps))]
+    async for shard, candles in _iter_shard_batches(
+        exchange, symbol, timeframe, shards, limit, concurrency, bucket=bucket, stats=stats,
+    ):
+        gap = np.searchsorted(gaps[:, 0], shard[0], side="right") - 1
+        received[gap].extend(candle[0] for candle in candles)
+        fetched.extend(candles)
+        if on_batch is not None:
+            on_batch(candles, stats)
+
+    # Что осталось пустым внутри пропуска после загрузки — этого у биржи нет.
+    # Диапазоны совпадут с пропусками, которые найдёт scan_gaps после вставки
+    unfillable = []
+    for (gap_start, gap_end), timestamps in zip(gaps.tolist(), received):
+        edges = np.asarray([gap_start - step, *sorted(set(timestamps)), gap_end], dtype=np.int64)
+        unfillable.extend(map(tuple, find_gaps(edges, step).tolist()))
+
+    stats["filled"] = splice_candles(path, fetched, unfillable_gaps=unfillable)
+    stats["unfillable"] = len(unfillable)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
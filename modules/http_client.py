@@ -0,0 +1,136 @@
+# flake8: noqa: E501
+import asyncio
+import importlib.util
+import json
+import threading
+
+import httpx
+import streamlit as st
+
+from modules.singleflight import SingleFlight, get_single_flight
+
+
+BYBIT_API_URL = "https://api.bybit.com"
+
+# Таймауты (секунды) по эндпоинтам v5; остальные получают DEFAULT_TIMEOUT
+DEFAULT_TIMEOUT = 10.0
+ENDPOINT_TIMEOUTS = {
+    "/v5/market/account-ratio": 10.0,
+    "/v5/market/open-interest": 10.0,
+    "/v5/market/funding/history": 10.0,
+    "/v5/market/tickers": 10.0,
+    "/v5/market/risk-limit": 20.0,
+}
+
+# HTTP/2 доступен только с установленным пакетом h2 (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# orjson разбирает ответы в несколько раз быстрее стандартного json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+
+class BybitHttpClient:
+    """
+    Долгоживущий пул keep-alive соединений к REST API Bybit v5.
+
+    httpx.AsyncClient привязан к event loop, в котором создан, а страницы
+    Streamlit каждый раз запускают новый loop через asyncio.run. Поэтому
+    клиент живёт в собственном loop в фоновом потоке, а запросы из любых
+    loop и потоков передаются туда через run_coroutine_threadsafe.
+    Соединения переиспользуются между запросами, страницами и сессиями.
+
+    С flights одинаковые одновременные запросы (эндпоинт + параметры)
+    склеиваются в один.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BYBIT_API_URL,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        http2: bool | None = None,
+        timeouts: dict[str, float] | None = None,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        flights: SingleFlight | None = None,
+    ):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self.flights = flights
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="bybit-http",
+            daemon=True,
+        )
+        self._thread.start()
+        self._client = self._submit(self._create_client()).result()
+
+    async def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=self.limits,
+            http2=self.http2,
+            timeout=self.default_timeout,
+        )
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _get_bytes(self, endpoint: str, params: dict | None) -> bytes:
+        if self.flights is None:
+            return await self._request(endpoint, params)
+        key = ("GET", endpoint, tuple(sorted((params or {}).items())))
+        return await self.flights.do_async(key, self._request, endpoint, params)
+
+    async def _request(self, endpoint: str, params: dict | None) -> bytes:
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        response = await self._client.get(endpoint, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+    async def _get(self, endpoint: str, params: dict | None) -> dict:
+        return json_loads(await self._get_bytes(endpoint, params))
+
+    async def get(self, endpoint: str, params: dict | None = None) -> dict:
+        """
+        GET к эндпоинту v5 из любого event loop. Возвращает разобранный JSON,
+        ошибки HTTP поднимаются как httpx.HTTPError.
+        """
+        return await asyncio.wrap_future(self._submit(self._get(endpoint, params)))
+
+    def get_sync(self, endpoint: str, params: dict | None = None) -> dict:
+        """
+        То же, что get, для синхронного кода.
+        """
+        return self._submit(self._get(endpoint, params)).result()
+
+    def get_bytes_sync(self, endpoint: str, params: dict | None = None) -> bytes:
+        """
+        Тело ответа без разбора — для своего парсинга больших ответов.
+        """
+        return self._submit(self._get_bytes(endpoint, params)).result()
+
+    def close(self) -> None:
+        self._submit(self._client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+@st.cache_resource
+def get_http_client() -> BybitHttpClient:
+    """
+    Общий на процесс HTTP-клиент для эндпоинтов Bybit v5.
+    """
+    return BybitHttpClient(flights=get_single_flight())
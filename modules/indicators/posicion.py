@@ -1,5 +1,7 @@
 # File: modules/indicators/posicion.py
 
+import math
+
 import streamlit as st
 
 from modules.calculations import (
@@ -7,16 +9,23 @@ from modules.calculations import (
     count_decimal_places,
     count_price_step,
 )
+from modules.montecarlo import liquidation_probability, log_returns
+from modules.risk_limits import get_tier_table
+from modules.solver import (
+    max_deposit,
+    max_leverage,
+    required_support_investment,
+)
 
 
-def posicion_settings(current_price: float) -> dict:
+def posicion_settings(current_price: float, symbol: str | None = None) -> dict:
     """
     Рисует в сайдбаре блок «Параметры позиции»:
       - выбор Long/Short
       - ввод entry_price, initial_deposit, leverage, support_investment
     Считает:
       - position_size
-      - liquidation_price и liquidation_perc
+      - liquidation_price и liquidation_perc по уровням риска символа
       - decimal_places и price_step для форматирования
     Возвращает словарь с этими значениями.
     """
@@ -73,12 +82,14 @@ def posicion_settings(current_price: float) -> dict:
 
     # Размер позиции и ликвидация
     position_size = initial_deposit * leverage
+    tiers = get_tier_table(symbol)
     liquidation_price, liquidation_perc = calculate_liquidation(
         entry_price,
         leverage,
         position_type,
         initial_deposit,
         support_investment,
+        tiers,
     )
 
     return {
@@ -92,14 +103,105 @@ def posicion_settings(current_price: float) -> dict:
         "position_size": position_size,
         "liquidation_price": liquidation_price,
         "liquidation_perc": liquidation_perc,
+        "tiers": tiers,
     }
 
 
-def position_info(current_price: float, position_details):
+def liquidation_target_settings(position_details: dict) -> None:
+    """
+    Рисует в сайдбаре блок «Подбор под цену ликвидации»:
+    по целевой цене ликвидации считает необходимые инвестиции в удержание,
+    максимальное плечо и максимальный депозит при текущих параметрах.
+    """
+    decimal_places = position_details["decimal_places"]
+
+    with st.expander("Подбор под цену ликвидации"):
+        target_price = st.number_input(
+            "Целевая цена ликвидации",
+            min_value=0.0,
+            value=float(position_details["liquidation_price"]),
+            format=f"%.{decimal_places}f",
+            step=position_details["price_step"],
+            key="pos_target_liquidation",
+        )
+
+        common = dict(
+            entry_price=position_details["entry_price"],
+            position_type=position_details["position_type"],
+            target_price=target_price,
+            tiers=position_details["tiers"],
+        )
+        support = required_support_investment(
+            leverage=position_details["leverage"],
+            initial_deposit=position_details["initial_deposit"],
+            **common,
+        )
+        leverage = max_leverage(
+            initial_deposit=position_details["initial_deposit"],
+            support_investment=position_details["support_investment"],
+            **common,
+        )
+        deposit = max_deposit(
+            leverage=position_details["leverage"],
+            support_investment=position_details["support_investment"],
+            **common,
+        )
+
+        def _fmt(value, template: str) -> str:
+            # NaN — цель недостижима, inf — ограничения нет
+            value = float(value)
+            if math.isnan(value):
+                return "—"
+            if math.isinf(value):
+                return "∞"
+            return template.format(value)
+
+        st.metric("Нужно инвестиций в удержание", _fmt(support, "${:.2f}"))
+        st.metric("Максимальное плечо", _fmt(leverage, "x{:.2f}"))
+        st.metric("Максимальный депозит", _fmt(deposit, "${:.2f}"))
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_liquidation_probability(
+    symbol: str,
+    timeframe: str,
+    last_candle_ts,
+    current_price: float,
+    liquidation_price: float,
+    position_type: str,
+    n_steps: int,
+    _returns,
+) -> float:
+    """
+    Кеш Монте-Карло по (symbol, timeframe, время последней свечи,
+    параметры позиции). Доходности не хешируются: они однозначно
+    определяются символом, таймфреймом и последней свечой.
+    """
+    return liquidation_probability(
+        _returns,
+        current_price,
+        liquidation_price,
+        position_type,
+        n_steps=n_steps,
+    )
+
+
+def position_info(
+    current_price: float,
+    position_details,
+    df_ohlcv=None,
+    symbol: str | None = None,
+    timeframe: str = "1m",
+    horizon: int = 1440,
+):
+    """
+    Метрики позиции. Если передан df_ohlcv, добавляет вероятность
+    ликвидации за horizon свечей timeframe по Монте-Карло.
+    """
     with st.spinner("Просчет позиции..."):
         decimal_places = position_details["decimal_places"]
 
-        col1, col2, col3, col4, col5 = st.columns(5)
+        col1, col2, col3, col4, col5, col6 = st.columns(6)
         col1.metric(
             "Текущая цена",
             f"${current_price:.{decimal_places}f}"
@@ -119,4 +221,23 @@ def position_info(current_price: float, position_details):
         col5.metric(
             "Цена ликвидации",
             f"${position_details['liquidation_price']:.{decimal_places}f}"
-        )   
\ No newline at end of file
+        )
+
+        if df_ohlcv is None or df_ohlcv.empty:
+            return
+
+        probability = cached_liquidation_probability(
+            symbol,
+            timeframe,
+            df_ohlcv["timestamp"].iat[-1],
+            current_price,
+            position_details["liquidation_price"],
+            position_details["position_type"],
+            horizon,
+            log_returns(df_ohlcv),
+        )
+        col6.metric(
+            f"Ликвидация за {horizon} × {timeframe}",
+            f"{probability * 100:.2f}%",
+            help="Монте-Карло: 100 000 путей, бутстрэп доходностей свечей",
+        )
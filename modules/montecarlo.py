@@ -0,0 +1,115 @@
+import math
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Общий на процесс пул воркеров. Используется spawn, а не fork:
+    сервер Streamlit многопоточный, и fork из него небезопасен.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=mp.get_context("spawn"),
+            )
+        return _pool
+
+
+def log_returns(df: pd.DataFrame) -> np.ndarray:
+    close = df["close"].to_numpy(dtype=np.float64)
+    returns = np.diff(np.log(close))
+    return returns[np.isfinite(returns)]
+
+
+def _simulate_chunk(
+    seed: np.random.SeedSequence,
+    n_paths: int,
+    n_steps: int,
+    returns: np.ndarray,
+    method: str,
+    barrier: float,
+    is_long: bool,
+) -> int:
+    """
+    Генерирует n_paths путей лог-цены и считает, сколько из них
+    коснулись барьера barrier = log(liquidation_price / current_price).
+    """
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        steps = returns[rng.integers(0, len(returns), size=(n_paths, n_steps))]
+    else:
+        steps = rng.normal(returns.mean(), returns.std(), size=(n_paths, n_steps))
+
+    paths = np.cumsum(steps, axis=1, out=steps)
+    if is_long:
+        return int(np.count_nonzero(paths.min(axis=1) <= barrier))
+    return int(np.count_nonzero(paths.max(axis=1) >= barrier))
+
+
+def liquidation_probability(
+    returns: np.ndarray,
+    current_price: float,
+    liquidation_price: float,
+    position_type: Literal["Long", "Short"],
+    n_steps: int = 1440,
+    n_paths: int = 100_000,
+    method: Literal["bootstrap", "gbm"] = "bootstrap",
+    seed: int = 0,
+    drift: bool = False,
+    chunk_paths: int = 2_000,
+    pool: ProcessPoolExecutor | None = None,
+) -> float:
+    """
+    Вероятность того, что цена коснётся цены ликвидации за n_steps свечей.
+
+    Пути строятся по лог-доходностям свечей: bootstrap — случайная выборка
+    исторических доходностей, gbm — нормальные приращения с их средним и
+    дисперсией. Пути генерируются пачками по chunk_paths и раздаются пулу
+    процессов. У каждой пачки свой SeedSequence, порождённый из seed,
+    поэтому результат детерминирован и не зависит от числа воркеров.
+
+    По умолчанию доходности центрируются: среднее по паре сотен свечей —
+    шум, который на горизонте в тысячу шагов превращается в сильный тренд.
+    """
+    if len(returns) == 0 or current_price <= 0:
+        return float("nan")
+    if liquidation_price <= 0:
+        return 0.0
+
+    is_long = position_type == "Long"
+    barrier = math.log(liquidation_price / current_price)
+    if (is_long and barrier >= 0) or (not is_long and barrier <= 0):
+        return 1.0
+
+    n_chunks = -(-n_paths // chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [chunk_paths] * (n_chunks - 1) + [n_paths - chunk_paths * (n_chunks - 1)]
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    if not drift:
+        returns = returns - returns.mean()
+
+    pool = pool or get_process_pool()
+    hits = pool.map(
+        _simulate_chunk,
+        seeds,
+        sizes,
+        [n_steps] * n_chunks,
+        [returns] * n_chunks,
+        [method] * n_chunks,
+        [barrier] * n_chunks,
+        [is_long] * n_chunks,
+    )
+    return sum(hits) / n_paths
@@ -0,0 +1,217 @@
+from typing import Literal
+
+import numpy as np
+
+from modules.calculations import DEFAULT_TIERS, TierTable
+
+
+class CrossMarginPortfolio:
+    """
+    Портфель позиций на одном кросс-маржинальном счёте.
+
+    Счёт ликвидируется, когда
+        Equity = Wallet Balance + Σ Unrealized PnL <= Σ Maintenance Margin.
+    Если цены остальных позиций не меняются, Equity линейна по цене позиции j,
+    поэтому её цена ликвидации на уровне счёта:
+        Long:  Mark Price_j - Buffer / Qty_j
+        Short: Mark Price_j + Buffer / Qty_j
+    где Buffer = Equity - Σ Maintenance Margin — общий запас маржи.
+
+    Портфель хранит суммы Unrealized PnL и Maintenance Margin и обновляет их
+    инкрементально: добавление, изменение и удаление позиции — O(1),
+    новая цена символа — O(k) по k позициям этого символа. Цена ликвидации
+    одной позиции считается за O(1), всех сразу — одним векторным выражением.
+
+    Maintenance Margin позиции, как и в calculate_liquidation, берётся
+    по уровню риска для стоимости позиции на входе (депозит × плечо).
+    """
+
+    def __init__(self, wallet_balance: float, capacity: int = 64):
+        if capacity < 1:
+            raise ValueError(f"capacity должна быть положительной, получено {capacity}")
+        self.wallet_balance = float(wallet_balance)
+
+        self._ids: dict[object, int] = {}
+        self._slot_ids: list[object] = [None] * capacity
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+        self._by_symbol: dict[str, set[int]] = {}
+        self._symbols: list[str | None] = [None] * capacity
+        self._tiers: list[TierTable | None] = [None] * capacity
+
+        self._active = np.zeros(capacity, dtype=bool)
+        self._sign = np.zeros(capacity)
+        self._entry = np.zeros(capacity)
+        self._qty = np.zeros(capacity)
+        self._deposit = np.zeros(capacity)
+        self._leverage = np.zeros(capacity)
+        self._mark = np.zeros(capacity)
+        self._upnl = np.zeros(capacity)
+        self._maint = np.zeros(capacity)
+
+        self._upnl_total = 0.0
+        self._maint_total = 0.0
+
+    # --- Агрегаты счёта ---
+
+    @property
+    def equity(self) -> float:
+        return self.wallet_balance + self._upnl_total
+
+    @property
+    def maintenance_margin(self) -> float:
+        return self._maint_total
+
+    @property
+    def margin_buffer(self) -> float:
+        return self.equity - self._maint_total
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, position_id) -> bool:
+        return position_id in self._ids
+
+    # --- Изменение портфеля ---
+
+    def add_position(
+        self,
+        position_id,
+        symbol: str,
+        position_type: Literal["Long", "Short"],
+        entry_price: float,
+        initial_deposit: float,
+        leverage: float,
+        mark_price: float | None = None,
+        tiers: TierTable = DEFAULT_TIERS,
+    ) -> None:
+        if position_id in self._ids:
+            raise KeyError(f"Позиция {position_id!r} уже есть в портфеле")
+        if position_type not in ("Long", "Short"):
+            raise ValueError(f"position_type должен быть 'Long' или 'Short', получено {position_type!r}")
+
+        # Всё, что может упасть, считается до изменения портфеля
+        pos_value = initial_deposit * leverage
+        mmr, mm_reduction = tiers.lookup(pos_value)
+        qty = pos_value / entry_price
+        mark_price = entry_price if mark_price is None else mark_price
+
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+
+        self._ids[position_id] = slot
+        self._slot_ids[slot] = position_id
+        self._symbols[slot] = symbol
+        self._tiers[slot] = tiers
+        self._by_symbol.setdefault(symbol, set()).add(slot)
+
+        self._active[slot] = True
+        self._sign[slot] = 1.0 if position_type == "Long" else -1.0
+        self._entry[slot] = entry_price
+        self._qty[slot] = qty
+        self._deposit[slot] = initial_deposit
+        self._leverage[slot] = leverage
+        self._mark[slot] = mark_price
+        self._upnl[slot] = self._sign[slot] * self._qty[slot] * (mark_price - entry_price)
+        self._maint[slot] = pos_value * mmr - mm_reduction
+
+        self._upnl_total += self._upnl[slot]
+        self._maint_total += self._maint[slot]
+
+    def remove_position(self, position_id) -> None:
+        slot = self._ids.pop(position_id)
+        symbol = self._symbols[slot]
+
+        self._upnl_total -= self._upnl[slot]
+        self._maint_total -= self._maint[slot]
+
+        self._by_symbol[symbol].discard(slot)
+        if not self._by_symbol[symbol]:
+            del self._by_symbol[symbol]
+
+        self._slot_ids[slot] = None
+        self._symbols[slot] = None
+        self._tiers[slot] = None
+        self._active[slot] = False
+        self._upnl[slot] = 0.0
+        self._maint[slot] = 0.0
+        self._free.append(slot)
+
+    def update_position(self, position_id, **changes) -> None:
+        """
+        Меняет параметры позиции (те же аргументы, что у add_position).
+        Незаданные параметры остаются прежними. Если новые параметры
+        не подходят, позиция остаётся как была.
+        """
+        slot = self._ids[position_id]
+        current = dict(
+            symbol=self._symbols[slot],
+            position_type="Long" if self._sign[slot] > 0 else "Short",
+            entry_price=self._entry[slot],
+            initial_deposit=self._deposit[slot],
+            leverage=self._leverage[slot],
+            mark_price=self._mark[slot],
+            tiers=self._tiers[slot],
+        )
+        unknown = changes.keys() - current.keys()
+        if unknown:
+            raise TypeError(f"update_position() получил неизвестные параметры: {', '.join(sorted(unknown))}")
+
+        self.remove_position(position_id)
+        try:
+            self.add_position(position_id, **{**current, **changes})
+        except Exception:
+            self.add_position(position_id, **current)
+            raise
+
+    def update_price(self, symbol: str, mark_price: float) -> None:
+        slots = self._by_symbol.get(symbol)
+        if not slots:
+            return
+
+        idx = np.fromiter(slots, dtype=np.intp, count=len(slots))
+        self._mark[idx] = mark_price
+        new_upnl = self._sign[idx] * self._qty[idx] * (mark_price - self._entry[idx])
+        self._upnl_total += new_upnl.sum() - self._upnl[idx].sum()
+        self._upnl[idx] = new_upnl
+
+    def set_wallet_balance(self, wallet_balance: float) -> None:
+        self.wallet_balance = float(wallet_balance)
+
+    def recompute(self) -> None:
+        """
+        Полный пересчёт сумм. Инкрементальные суммы накапливают ошибку
+        округления, поэтому при очень долгой жизни портфеля их стоит
+        изредка сверять.
+        """
+        self._upnl_total = float(self._upnl[self._active].sum())
+        self._maint_total = float(self._maint[self._active].sum())
+
+    # --- Цены ликвидации ---
+
+    def liquidation_price(self, position_id) -> float:
+        slot = self._ids[position_id]
+        price = self._mark[slot] - self.margin_buffer / (self._sign[slot] * self._qty[slot])
+        return max(float(price), 0.0)
+
+    def liquidation_prices(self) -> dict[object, float]:
+        slots = np.flatnonzero(self._active)
+        prices = self._mark[slots] - self.margin_buffer / (self._sign[slots] * self._qty[slots])
+        prices = np.maximum(prices, 0.0)
+        return {self._slot_ids[slot]: float(price) for slot, price in zip(slots, prices)}
+
+    def _grow(self) -> None:
+        old = len(self._active)
+        new = old * 2
+        for name in (
+            "_active", "_sign", "_entry", "_qty", "_deposit",
+            "_leverage", "_mark", "_upnl", "_maint",
+        ):
+            array = getattr(self, name)
+            grown = np.zeros(new, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self._slot_ids.extend([None] * old)
+        self._symbols.extend([None] * old)
+        self._tiers.extend([None] * old)
+        self._free.extend(range(new - 1, old - 1, -1))
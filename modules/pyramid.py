@@ -0,0 +1,137 @@
+# flake8: noqa: E501
+"""
+Пирамида таймфреймов для скачанных наборов данных.
+
+Рядом с datasets/<SYMBOL>/1m хранятся уровни 5m, 15m, 1h, 4h и 1d в том же
+формате (modules.dataset). Каждый уровень собирается из предыдущего и помнит,
+из какого состояния минутного набора построен (dataset_version и rows), поэтому
+пересборка нужна только после дозагрузки или вставки пропусков.
+
+График берёт уровень, при котором видимый диапазон укладывается в заданное
+число свечей, — рисуется ограниченное число баров при любом масштабе.
+"""
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modules.candle_store import OHLCV_COLUMNS
+from modules.dataset import DATASETS_DIR, DatasetWriter, dataset_path, dataset_version, read_dataset, read_meta
+from modules.resample import TIMEFRAME_MS, resample_ohlcv
+
+
+PYRAMID_LEVELS = ("1m", "5m", "15m", "1h", "4h", "1d")
+
+
+_build_locks: dict[Path, threading.Lock] = {}
+_build_locks_lock = threading.Lock()
+
+
+def _build_lock(source_path: Path) -> threading.Lock:
+    with _build_locks_lock:
+        return _build_locks.setdefault(source_path.resolve(), threading.Lock())
+
+
+def build_pyramid(source_path: Path, levels=PYRAMID_LEVELS[1:]) -> dict[str, int]:
+    """
+    Собирает (или оставляет актуальные) уровни пирамиды из минутного
+    набора source_path (datasets/<SYMBOL>/1m); уровни ложатся рядом.
+    Возвращает число баров на каждом уровне.
+
+    Если все уровни построены по текущей версии минутного набора, данные
+    не читаются вовсе — вызывать можно на каждой перерисовке страницы.
+    Устаревший уровень собирается во временном каталоге и подменяет
+    прежний целиком; сборки одного набора из разных сессий идут по очереди.
+    """
+    source_path = Path(source_path)
+    source_meta = read_meta(source_path)
+    if source_meta is None:
+        raise FileNotFoundError(f"Нет минутных данных в {source_path}")
+
+    source = {"version": dataset_version(source_meta), "rows": source_meta["rows"]}
+    metas = {timeframe: read_meta(source_path.parent / timeframe) for timeframe in levels}
+    if all(meta is not None and meta.get("source") == source for meta in metas.values()):
+        return {timeframe: meta["rows"] for timeframe, meta in metas.items()}
+
+    with _build_lock(source_path):
+        price_dtype = np.dtype(source_meta["columns"]["open"]).name
+        previous = source_path
+        columns = None
+        counts = {}
+        for timeframe in levels:
+            path = source_path.parent / timeframe
+            meta = read_meta(path)
+            if meta is not None and meta.get("source") == source:
+                # Уровень актуален (или его только что собрала другая сессия)
+                columns = None
+                counts[timeframe] = meta["rows"]
+            else:
+                # Каждый уровень — из предыдущего: границы 5m/15m/1h/4h/1d вложены
+                if columns is None:
+                    columns = read_dataset(previous)
+                columns = resample_ohlcv(columns, timeframe)
+                _replace_level(path, timeframe, columns, price_dtype, source_meta, source)
+                counts[timeframe] = len(columns["timestamp"])
+            previous = path
+    return counts
+
+
+def _replace_level(path: Path, timeframe: str, columns: dict, price_dtype: str, source_meta: dict, source: dict) -> None:
+    """
+    Записывает уровень во временный каталог рядом и подменяет им прежний:
+    читатели видят либо старый уровень целиком, либо новый.
+    """
+    tmp_path = path.with_name(path.name + ".build")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    writer = DatasetWriter(
+        tmp_path, timeframe, price_dtype=price_dtype,
+        compression=source_meta["compression"], reset=True,
+        symbol=source_meta.get("symbol"), source=source,
+    )
+    writer.append(np.column_stack([
+        np.asarray(columns[name], dtype=np.float64) for name in OHLCV_COLUMNS
+    ]))
+
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(old_path, ignore_errors=True)
+    if path.exists():
+        path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def select_level(start_ms: int, end_ms: int, max_candles: int = 1000, levels=PYRAMID_LEVELS) -> str:
+    """
+    Самый подробный таймфрейм, на котором [start_ms, end_ms] занимает
+    не больше max_candles свечей (или самый крупный, если таких нет).
+    """
+    for timeframe in levels:
+        if (end_ms - start_ms) // TIMEFRAME_MS[timeframe] <= max_candles:
+            return timeframe
+    return levels[-1]
+
+
+def pyramid_window(
+    symbol: str,
+    start_ms: int,
+    end_ms: int,
+    max_candles: int = 1000,
+    root: Path = DATASETS_DIR,
+) -> tuple[str, pd.DataFrame]:
+    """
+    Свечи видимого диапазона с подходящего уровня пирамиды: таймфрейм
+    и DataFrame (как у load_dataset_frame). С диска читается только
+    нужный срез уровня.
+    """
+    levels = [tf for tf in PYRAMID_LEVELS if read_meta(dataset_path(symbol, tf, root)) is not None]
+    timeframe = select_level(start_ms, end_ms, max_candles, levels)
+
+    columns = read_dataset(dataset_path(symbol, timeframe, root))
+    timestamps = columns["timestamp"]
+    lo = np.searchsorted(timestamps, start_ms - TIMEFRAME_MS[timeframe], side="right")
+    hi = np.searchsorted(timestamps, end_ms, side="right")
+    df = pd.DataFrame({name: np.asarray(columns[name][lo:hi]) for name in OHLCV_COLUMNS})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return timeframe, df
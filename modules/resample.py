@@ -0,0 +1,126 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from modules.candle_store import OHLCV_COLUMNS
+
+
+# Длительность таймфреймов в миллисекундах. Бары выравниваются по UTC,
+# как и у Bybit: 5m по :00/:05, 1h по началу часа, 1d по 00:00 UTC.
+TIMEFRAME_MS = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+
+def resample_ohlcv(columns: dict[str, np.ndarray], timeframe: str) -> dict[str, np.ndarray]:
+    """
+    Собирает бары таймфрейма timeframe из более мелких свечей
+    (колонки OHLCV, timestamp — int64 мс, по возрастанию).
+
+    open — первая свеча бара, close — последняя, high/low — экстремумы,
+    volume — сумма. Всё через ufunc.reduceat по границам бакетов,
+    без цикла по барам.
+    """
+    step = TIMEFRAME_MS[timeframe]
+    timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+    if not len(timestamps):
+        return {name: np.asarray(columns[name])[:0] for name in OHLCV_COLUMNS}
+
+    buckets = timestamps - timestamps % step
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(buckets)) - 1
+
+    return {
+        "timestamp": buckets[starts],
+        "open": np.asarray(columns["open"])[starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": np.asarray(columns["close"])[ends],
+        "volume": np.add.reduceat(columns["volume"], starts),
+    }
+
+
+def _aggregate(bucket: int, candles: list[list]) -> list:
+    return [
+        bucket,
+        candles[0][1],
+        max(candle[2] for candle in candles),
+        min(candle[3] for candle in candles),
+        candles[-1][4],
+        sum(candle[5] for candle in candles),
+    ]
+
+
+class TimeframeResampler:
+    """
+    Инкрементальная сборка старших таймфреймов из потока минутных свечей.
+
+    seed() строит историю векторно через resample_ohlcv. Дальше update()
+    принимает минутную свечу (новую или обновление незакрытой) и
+    пересчитывает только последний, открытый бар каждого таймфрейма —
+    по минутам, которые в него входят (не больше step / 1m).
+    """
+
+    def __init__(self, timeframes: list[str], max_bars: int = 5000):
+        self.timeframes = list(timeframes)
+        self._bars = {tf: deque(maxlen=max_bars) for tf in self.timeframes}
+        self._open_minutes: dict[str, list[list]] = {tf: [] for tf in self.timeframes}
+        self.last_timestamp: int | None = None
+
+    def seed(self, columns: dict[str, np.ndarray]) -> None:
+        timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+        for tf in self.timeframes:
+            bars = resample_ohlcv(columns, tf)
+            self._bars[tf].clear()
+            self._bars[tf].extend(
+                [int(row[0]), *map(float, row[1:])]
+                for row in zip(*(bars[name] for name in OHLCV_COLUMNS))
+            )
+
+            # Минуты открытого бара нужны, чтобы обновлять его дальше
+            self._open_minutes[tf] = []
+            if len(timestamps):
+                step = TIMEFRAME_MS[tf]
+                first = np.searchsorted(timestamps, timestamps[-1] - timestamps[-1] % step)
+                self._open_minutes[tf] = [
+                    [int(row[0]), *map(float, row[1:])]
+                    for row in zip(*(np.asarray(columns[name])[first:] for name in OHLCV_COLUMNS))
+                ]
+
+        self.last_timestamp = int(timestamps[-1]) if len(timestamps) else None
+
+    def update(self, candle: list) -> None:
+        ts = int(candle[0])
+        if self.last_timestamp is not None and ts < self.last_timestamp:
+            return
+
+        for tf in self.timeframes:
+            bucket = ts - ts % TIMEFRAME_MS[tf]
+            bars = self._bars[tf]
+            minutes = self._open_minutes[tf]
+
+            if bars and bars[-1][0] == bucket:
+                if minutes and minutes[-1][0] == ts:
+                    minutes[-1] = candle
+                else:
+                    minutes.append(candle)
+                bars[-1] = _aggregate(bucket, minutes)
+            else:
+                minutes[:] = [candle]
+                bars.append(_aggregate(bucket, minutes))
+
+        self.last_timestamp = ts
+
+    def to_frame(self, timeframe: str, limit: int | None = None) -> pd.DataFrame:
+        bars = list(self._bars[timeframe])
+        if limit is not None:
+            bars = bars[-limit:]
+        df = pd.DataFrame(bars, columns=list(OHLCV_COLUMNS))
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
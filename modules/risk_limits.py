@@ -0,0 +1,140 @@
+# flake8: noqa: E501
+import json
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from modules.calculations import DEFAULT_TIERS, TierTable
+from modules.config import CACHE_DIR
+
+
+RISK_LIMIT_ENDPOINT = "/v5/market/risk-limit"
+RISK_LIMITS_PATH = CACHE_DIR / "risk_limits.json"
+RISK_LIMITS_TTL = 12 * 60 * 60  # секунд
+RISK_LIMITS_RETRY = 60  # пауза перед повторным запросом, если биржа недоступна
+
+_registry: dict[str, TierTable] = {}
+_registry_loaded_at = float("-inf")
+_registry_lock = threading.Lock()
+
+
+def fetch_risk_limits(category: str = "linear") -> dict[str, list[dict]]:
+    """
+    HTTP Request
+    ------------
+    GET /v5/market/risk-limit
+
+    Загружает уровни риска сразу для всех символов категории,
+    проходя по страницам через nextPageCursor.
+
+    Returns
+    -------
+    dict[str, list[dict]]
+        symbol -> список уровней {"limit", "mmr", "reduction"}.
+    """
+    # HTTP-клиент живёт в кеше Streamlit: импорт только при обращении к бирже,
+    # чтобы расчётные модули не зависели от Streamlit
+    from modules.http_client import get_http_client
+
+    levels: dict[str, list[dict]] = {}
+    params = {"category": category}
+    client = get_http_client()
+
+    while True:
+        result = client.get_sync(RISK_LIMIT_ENDPOINT, params).get("result", {})
+
+        for item in result.get("list", []):
+            levels.setdefault(item["symbol"], []).append({
+                "limit": float(item["riskLimitValue"]),
+                "mmr": float(item["maintenanceMargin"]),
+                # у первого уровня Bybit отдаёт пустую строку
+                "reduction": float(item.get("mmDeduction") or 0),
+            })
+
+        cursor = result.get("nextPageCursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+    return levels
+
+
+def _read_snapshot(path: Path) -> tuple[float, dict[str, list[dict]]] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        return snapshot["saved_at"], snapshot["levels"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_snapshot(path: Path, levels: dict[str, list[dict]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": time.time(), "levels": levels}, f)
+    tmp_path.replace(path)
+
+
+def load_risk_limits(
+    path: Path = RISK_LIMITS_PATH,
+    ttl: float = RISK_LIMITS_TTL,
+    force: bool = False,
+) -> dict[str, TierTable]:
+    """
+    Возвращает реестр таблиц уровней риска по символам.
+
+    Порядок источников:
+      1. реестр в памяти процесса, если он моложе ttl;
+      2. снапшот на диске, если он моложе ttl;
+      3. эндпоинт Bybit /v5/market/risk-limit (результат сохраняется на диск);
+      4. устаревший снапшот на диске, если биржа недоступна.
+    """
+    global _registry, _registry_loaded_at
+
+    with _registry_lock:
+        now = time.time()
+        if not force and now - _registry_loaded_at < ttl:
+            return _registry
+
+        snapshot = _read_snapshot(path)
+        if not force and snapshot and now - snapshot[0] < ttl:
+            saved_at, levels = snapshot
+        else:
+            try:
+                levels = fetch_risk_limits()
+                saved_at = now
+                _write_snapshot(path, levels)
+            except (httpx.HTTPError, OSError, ValueError, KeyError) as e:
+                if snapshot is None:
+                    print(f"Не удалось загрузить уровни риска: {e}")
+                    _registry_loaded_at = now - ttl + RISK_LIMITS_RETRY
+                    return _registry
+                saved_at, levels = snapshot
+                # Снапшот уже старше ttl: следующая попытка — не раньше чем через RISK_LIMITS_RETRY
+                saved_at = max(saved_at, now - ttl + RISK_LIMITS_RETRY)
+
+        _registry = {
+            symbol: TierTable.from_levels(symbol_levels)
+            for symbol, symbol_levels in levels.items()
+            if symbol_levels
+        }
+        _registry_loaded_at = saved_at
+        return _registry
+
+
+def get_tier_table(symbol: str | None) -> TierTable:
+    """
+    Таблица уровней риска для символа. Если символ неизвестен
+    или реестр недоступен — возвращает DEFAULT_TIERS (BTC-подобные уровни).
+    """
+    if not symbol:
+        return DEFAULT_TIERS
+
+    registry = load_risk_limits()
+    tiers = registry.get(symbol.upper().replace("/", ""))
+    if tiers is None:
+        return DEFAULT_TIERS
+    return tiers
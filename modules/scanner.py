@@ -0,0 +1,91 @@
+# flake8: noqa: E501
+"""
+Поиск точек роста сразу по всем скачанным наборам данных.
+
+Каждый символ обрабатывается в отдельном процессе общего пула
+(modules.montecarlo.get_process_pool): воркер открывает колонки через
+memmap и возвращает короткую сводку, а не свечи. Точки роста берутся из
+сохранённого индекса (modules.anomaly_index), так что повторный скан
+считает только новые свечи. Результаты отдаются по мере готовности —
+таблицу можно показывать, не дожидаясь всех.
+"""
+from concurrent.futures import as_completed
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from modules.dataset import DATASETS_DIR, available_symbols, convert_csv, dataset_path, read_dataset, read_meta
+from modules.anomaly_index import load_growth_points
+from modules.detection import rolling_mean
+from modules.montecarlo import get_process_pool
+
+
+def scan_symbol(
+    symbol: str,
+    path: str,
+    window: int,
+    threshold_pct: float,
+    cooldown: int = 100,
+    csv_path: str | None = None,
+) -> dict:
+    """
+    Сводка точек роста одного набора данных: число точек, сильнейшее
+    превышение SMA и время последней точки. Если набора ещё нет, а есть
+    CSV старого формата (csv_path), он сначала переводится в набор.
+    """
+    if csv_path is not None and read_meta(Path(path)) is None and Path(csv_path).exists():
+        convert_csv(Path(csv_path), Path(path))
+    points = load_growth_points(Path(path), window, threshold_pct, cooldown)
+    columns = read_dataset(Path(path), columns=("timestamp", "close"))
+    close = columns["close"]
+
+    summary = {
+        "symbol": symbol,
+        "candles": len(close),
+        "points": len(points),
+        "max_excess_pct": np.nan,
+        "last_point": None,
+    }
+    if len(points):
+        sma = rolling_mean(close, window)
+        excess = (np.asarray(close[points], dtype=np.float64) / sma[points] - 1) * 100
+        summary["max_excess_pct"] = float(excess.max())
+        summary["last_point"] = int(columns["timestamp"][points[-1]])
+    return summary
+
+
+def scan_datasets(
+    window: int,
+    threshold_pct: float,
+    cooldown: int = 100,
+    root: Path = DATASETS_DIR,
+    symbols: list[str] | None = None,
+    pool=None,
+) -> Iterator[dict]:
+    """
+    Запускает scan_symbol по всем символам и отдаёт сводки в порядке
+    готовности. CSV старого формата переводятся в наборы данных в тех же
+    процессах пула, параллельно со сканированием остальных.
+    Ошибка по символу не останавливает остальные: в сводке будет error.
+    """
+    if symbols is None:
+        symbols = available_symbols(root)
+    if pool is None:
+        pool = get_process_pool()
+
+    futures = {}
+    for symbol in symbols:
+        path = dataset_path(symbol, "1m", root)
+        csv_path = Path(root) / f"{symbol}.csv"
+        future = pool.submit(
+            scan_symbol, symbol, str(path.resolve()), window, threshold_pct, cooldown,
+            str(csv_path.resolve()),
+        )
+        futures[future] = symbol
+
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            yield {"symbol": futures[future], "error": str(e)}
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Hashable
+
+import streamlit as st
+
+
+class SingleFlight:
+    """
+    Склейка одинаковых одновременных запросов: пока запрос по ключу
+    выполняется, остальные вызовы с тем же ключом ждут его результата
+    (или ошибки) вместо собственного похода в сеть.
+
+    Работает между потоками сессий Streamlit и между разными event loop:
+    результат передаётся через concurrent.futures.Future.
+
+    Счётчики:
+      - misses    — запросы, реально ушедшие на биржу;
+      - coalesced — вызовы, дождавшиеся чужого запроса;
+      - hits      — ответы из локальных данных без запроса (record_hit).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        """
+        Возвращает future запроса по ключу и признак того, что вызывающий
+        стал ведущим и должен выполнить запрос сам.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["misses"] += 1
+            return future, True
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) или ждёт уже идущий вызов с тем же ключом.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: Hashable, func: Callable[..., Awaitable], *args, **kwargs):
+        """
+        Асинхронный вариант do: func — корутинная функция.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key)
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self._stats["hits"] += 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Снимок счётчиков и число запросов, выполняющихся прямо сейчас.
+        """
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+
+@st.cache_resource
+def get_single_flight() -> SingleFlight:
+    """
+    Общий на процесс (на все сессии) слой склейки запросов к бирже.
+    """
+    return SingleFlight()
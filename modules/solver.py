@@ -0,0 +1,144 @@
+"""
+Обратные задачи к calculate_liquidation.
+
+Формула ликвидации на уровне риска i:
+    (Total Margin - Maintenance Margin) / Position Value = k,
+    Maintenance Margin = Position Value × mmr_i - reduction_i,
+где k — относительное расстояние до ликвидации (для Long 1 - liq / entry,
+для Short liq / entry - 1). На каждом уровне формула линейна, поэтому
+решение ищется в замкнутом виде отдельно для каждого уровня, а затем
+выбирается тот уровень, в границы которого попало решение.
+Расстояние до ликвидации монотонно убывает с ростом позиции, поэтому
+допустимые значения плеча и депозита образуют интервал (0, максимум].
+"""
+
+import numpy as np
+
+from modules.calculations import DEFAULT_TIERS, TierTable, as_is_long
+
+
+def target_ratio(
+    entry_price,
+    position_type,
+    target_price=None,
+    target_distance=None,
+) -> np.ndarray:
+    """
+    Относительное расстояние до ликвидации k для целевой цены ликвидации
+    либо для целевого расстояния в процентах (как liquidation_perc).
+    """
+    if target_distance is not None:
+        return np.asarray(target_distance, dtype=np.float64) / 100
+
+    if target_price is None:
+        raise ValueError("Нужно указать target_price или target_distance")
+
+    entry_price = np.asarray(entry_price, dtype=np.float64)
+    price_ratio = np.asarray(target_price, dtype=np.float64) / entry_price
+    return np.where(as_is_long(position_type), 1 - price_ratio, price_ratio - 1)
+
+
+def _tier_bounds(tiers: TierTable) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Границы (lower, upper] размера позиции для каждого уровня.
+    Последний уровень не ограничен сверху — как в get_maintenance_margin.
+    """
+    limits, mmr, reduction = tiers.as_arrays()
+    upper = limits.copy()
+    upper[-1] = np.inf
+    lower = np.concatenate(([0.0], limits[:-1]))
+    return lower, upper, mmr, reduction
+
+
+def required_support_investment(
+    entry_price,
+    leverage,
+    position_type,
+    initial_deposit,
+    target_price=None,
+    target_distance=None,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> np.ndarray:
+    """
+    Минимальные инвестиции в удержание позиции, при которых цена ликвидации
+    не ближе целевой. Размер позиции не зависит от инвестиций, поэтому уровень
+    риска известен заранее и ответ — одна формула:
+        support = Position Value × (k + mmr) - reduction - Initial Deposit.
+    Если целевая цена достигается и без инвестиций, возвращается 0.
+    """
+    k = target_ratio(entry_price, position_type, target_price, target_distance)
+    leverage = np.asarray(leverage, dtype=np.float64)
+    initial_deposit = np.asarray(initial_deposit, dtype=np.float64)
+
+    limits, mmr, reduction = tiers.as_arrays()
+    pos_value = initial_deposit * leverage
+    tier = np.minimum(np.searchsorted(limits, pos_value, side="left"), len(limits) - 1)
+
+    support = pos_value * (k + mmr[tier]) - reduction[tier] - initial_deposit
+    return np.maximum(support, 0.0)
+
+
+def max_leverage(
+    entry_price,
+    position_type,
+    initial_deposit,
+    support_investment,
+    target_price=None,
+    target_distance=None,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> np.ndarray:
+    """
+    Максимальное (дробное) плечо, при котором цена ликвидации не ближе целевой.
+    На уровне i: Position Value = (Total Margin + reduction_i) / (k + mmr_i).
+    NaN, если цель недостижима даже при минимальной позиции.
+    """
+    k = target_ratio(entry_price, position_type, target_price, target_distance)
+    initial_deposit = np.asarray(initial_deposit, dtype=np.float64)
+    total_margin = initial_deposit + np.asarray(support_investment, dtype=np.float64)
+
+    lower, upper, mmr, reduction = _tier_bounds(tiers)
+    k = np.asarray(k)[..., None]
+    total_margin = total_margin[..., None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = k + mmr
+        # rate <= 0: условие выполняется на всём уровне
+        pos_value = np.where(rate > 0, (total_margin + reduction) / rate, np.inf)
+        pos_value = np.minimum(pos_value, upper)
+        pos_value = np.where(pos_value > lower, pos_value, -np.inf)
+        best = pos_value.max(axis=-1)
+        return np.where(best > 0, best, np.nan) / initial_deposit
+
+
+def max_deposit(
+    entry_price,
+    leverage,
+    position_type,
+    support_investment,
+    target_price=None,
+    target_distance=None,
+    tiers: TierTable = DEFAULT_TIERS,
+) -> np.ndarray:
+    """
+    Максимальный начальный депозит при заданном плече, при котором цена
+    ликвидации не ближе целевой. На уровне i:
+        Initial Deposit = (Support + reduction_i) / (Leverage × (k + mmr_i) - 1).
+    inf — ограничения нет, NaN — цель недостижима.
+    """
+    k = target_ratio(entry_price, position_type, target_price, target_distance)
+    leverage = np.asarray(leverage, dtype=np.float64)
+    support_investment = np.asarray(support_investment, dtype=np.float64)
+
+    lower, upper, mmr, reduction = _tier_bounds(tiers)
+    k = np.asarray(k)[..., None]
+    lev = leverage[..., None]
+    support = support_investment[..., None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = lev * (k + mmr) - 1
+        # slope <= 0: условие выполняется на всём уровне
+        deposit = np.where(slope > 0, (support + reduction) / slope, np.inf)
+        pos_value = np.minimum(deposit * lev, upper)
+        pos_value = np.where(pos_value > lower, pos_value, -np.inf)
+        best = pos_value.max(axis=-1)
+        return np.where(best > 0, best, np.nan) / leverage
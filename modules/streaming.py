@@ -0,0 +1,318 @@
+# flake8: noqa: E501
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+import pandas as pd
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+
+BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/linear"
+
+# Таймфреймы графика -> интервалы топиков kline Bybit v5
+KLINE_INTERVALS = {
+    "1m": "1",
+    "5m": "5",
+    "15m": "15",
+    "1h": "60",
+    "1d": "D",
+}
+_INTERVAL_TIMEFRAMES = {interval: tf for tf, interval in KLINE_INTERVALS.items()}
+
+
+class CandleBuffer:
+    """
+    Последние maxlen свечей одного (symbol, timeframe) в памяти.
+    Свеча с тем же временем, что последняя, заменяет её (незакрытая
+    свеча), более новая — добавляется, более старая — игнорируется.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self._candles: deque[list] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.seeded = False
+        self.updated_at: float | None = None  # time.monotonic() последнего обновления
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def update(self, candle: list) -> None:
+        with self._lock:
+            self._update(candle)
+            self.updated_at = time.monotonic()
+
+    def _update(self, candle: list) -> None:
+        if self._candles and candle[0] == self._candles[-1][0]:
+            self._candles[-1] = candle
+        elif not self._candles or candle[0] > self._candles[-1][0]:
+            self._candles.append(candle)
+
+    def seed(self, candles: list[list]) -> None:
+        """
+        Заполняет буфер историей из REST. Свечи, пришедшие из потока
+        раньше истории и более новые, чем она, сохраняются.
+        """
+        with self._lock:
+            streamed = list(self._candles)
+            self._candles.clear()
+            for candle in candles:
+                self._update(candle)
+            for candle in streamed:
+                self._update(candle)
+            self.seeded = True
+            self.updated_at = time.monotonic()
+
+    def to_frame(self, limit: int | None = None) -> pd.DataFrame:
+        with self._lock:
+            candles = list(self._candles)
+        if limit is not None:
+            candles = candles[-limit:]
+        df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+        return df
+
+
+class MarketStream:
+    """
+    Подписка на публичные топики Bybit v5 (kline.<interval>.<symbol>
+    и tickers.<symbol>) с буферами свечей и тикеров в памяти.
+
+    Соединение живёт в собственном event loop в фоновом потоке, при
+    обрыве переподключается и заново подписывается на все топики.
+    Читать буферы можно из любого потока.
+
+    Пока соединения нет, candles и ticker отдают None (страница идёт
+    в REST), а не застывшие данные. При обрыве буферы с историей
+    помечаются как незаполненные, а тикеры забываются. Свечи, закрывшиеся
+    без соединения, в поток уже не придут, поэтому после переподключения
+    on_reconnect получает ключи (symbol, timeframe) этих буферов, чтобы
+    заново заполнить их из REST через seed. Вызывается в пуле потоков loop.
+    """
+
+    def __init__(
+        self,
+        url: str = BYBIT_WS_URL,
+        buffer_size: int = 1000,
+        ping_interval: float = 20.0,
+        reconnect_delay: float = 1.0,
+        on_reconnect: Callable[[list[tuple[str, str]]], None] | None = None,
+    ):
+        self.url = url
+        self.buffer_size = buffer_size
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.on_reconnect = on_reconnect
+
+        self._topics: set[str] = set()
+        self._buffers: dict[tuple[str, str], CandleBuffer] = {}
+        self._tickers: dict[str, dict] = {}
+        self._ticker_times: dict[str, float] = {}
+        self._stale: set[tuple[str, str]] = set()  # буферы, заполненные до обрыва
+        self._lock = threading.Lock()
+        self._ws = None
+        self._connected = False
+        self._stopped = False
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever,
+            name="bybit-ws",
+            daemon=True,
+        )
+        self._thread.start()
+        self._task = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    # --- Подписки и чтение ---
+
+    def subscribe(self, symbol: str, timeframes: list[str] = ()) -> None:
+        topics = [f"tickers.{symbol}"]
+        topics += [f"kline.{KLINE_INTERVALS[tf]}.{symbol}" for tf in timeframes]
+
+        with self._lock:
+            new = [topic for topic in topics if topic not in self._topics]
+            self._topics.update(new)
+            for tf in timeframes:
+                self._buffer(symbol, tf)
+
+        if new:
+            asyncio.run_coroutine_threadsafe(self._send_subscribe(new), self._loop)
+
+    def _buffer(self, symbol: str, timeframe: str) -> CandleBuffer:
+        key = (symbol, timeframe)
+        if key not in self._buffers:
+            self._buffers[key] = CandleBuffer(self.buffer_size)
+        return self._buffers[key]
+
+    def seed(self, symbol: str, timeframe: str, candles: list[list]) -> None:
+        with self._lock:
+            buffer = self._buffer(symbol, timeframe)
+        buffer.seed(candles)
+
+    def candles(self, symbol: str, timeframe: str, limit: int) -> pd.DataFrame | None:
+        """
+        Последние limit свечей из буфера или None, если соединения нет,
+        буфер ещё не заполнен историей или в нём меньше limit свечей.
+        """
+        buffer = self._buffers.get((symbol, timeframe))
+        if not self._connected or buffer is None or not buffer.seeded or len(buffer) < limit:
+            return None
+        return buffer.to_frame(limit)
+
+    def candles_age(self, symbol: str, timeframe: str) -> float | None:
+        """
+        Сколько секунд назад буфер последний раз обновлялся (сообщением
+        потока или seed), или None, если candles сейчас отдаст None.
+        """
+        buffer = self._buffers.get((symbol, timeframe))
+        if not self._connected or buffer is None or not buffer.seeded or buffer.updated_at is None:
+            return None
+        return time.monotonic() - buffer.updated_at
+
+    def ticker(self, symbol: str) -> dict | None:
+        """
+        Тикер в форме, совместимой с ccxt.fetch_ticker (last, high, low, ...,
+        исходные поля в info), или None, если соединения нет или снапшота
+        после подключения ещё не было.
+        """
+        info = self._tickers.get(symbol)
+        if not self._connected or not info or "lastPrice" not in info:
+            return None
+        info = dict(info)
+        return {
+            "symbol": symbol,
+            "last": float(info["lastPrice"]),
+            "high": float(info.get("highPrice24h") or 0),
+            "low": float(info.get("lowPrice24h") or 0),
+            "percentage": float(info.get("price24hPcnt") or 0) * 100,
+            "quoteVolume": float(info.get("turnover24h") or 0),
+            "info": info,
+        }
+
+    def ticker_age(self, symbol: str) -> float | None:
+        """
+        Сколько секунд назад пришло последнее сообщение тикера, или None,
+        если ticker сейчас отдаст None.
+        """
+        updated_at = self._ticker_times.get(symbol)
+        if updated_at is None or self.ticker(symbol) is None:
+            return None
+        return time.monotonic() - updated_at
+
+    def close(self) -> None:
+        self._stopped = True
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _shutdown(self) -> None:
+        # Задачи отменяются и дожидаются, чтобы соединение закрылось штатно
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # --- Соединение ---
+
+    async def _send_subscribe(self, topics: list[str]) -> None:
+        if self._ws is not None:
+            try:
+                await self._ws.send(json.dumps({"op": "subscribe", "args": topics}))
+            except ConnectionClosed:
+                pass  # подпишемся заново после переподключения
+
+    async def _ping(self, ws) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    def _disconnected(self) -> None:
+        """
+        При обрыве: буферы с историей — незаполненные (запоминаются для
+        on_reconnect), тикеры забываются до нового снапшота.
+        """
+        with self._lock:
+            self._connected = False
+            for key, buffer in self._buffers.items():
+                if buffer.seeded:
+                    buffer.seeded = False
+                    self._stale.add(key)
+            self._tickers.clear()
+            self._ticker_times.clear()
+
+    def _invalidate_buffers(self) -> None:
+        """
+        После переподключения: буферы, заполненные до обрыва или пока
+        соединения не было, — незаполненные, on_reconnect заполняет их заново.
+        """
+        with self._lock:
+            keys = self._stale | {key for key, buffer in self._buffers.items() if buffer.seeded}
+            self._stale.clear()
+            for key in keys:
+                self._buffers[key].seeded = False
+        keys = sorted(keys)
+        if keys and self.on_reconnect is not None:
+            self._loop.run_in_executor(None, self.on_reconnect, keys)
+
+    async def _run(self) -> None:
+        connected = False
+        while not self._stopped:
+            try:
+                async with connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    with self._lock:
+                        topics = sorted(self._topics)
+                    if topics:
+                        await ws.send(json.dumps({"op": "subscribe", "args": topics}))
+                    if connected:
+                        self._invalidate_buffers()
+                    connected = self._connected = True
+
+                    ping = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_message(json.loads(raw))
+                    finally:
+                        ping.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Bybit WebSocket: {e}. Переподключение...")
+            finally:
+                self._ws = None
+                if self._connected:
+                    self._disconnected()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def handle_message(self, message: dict) -> None:
+        topic = message.get("topic", "")
+
+        if topic.startswith("kline."):
+            _, interval, symbol = topic.split(".", 2)
+            timeframe = _INTERVAL_TIMEFRAMES.get(interval)
+            if timeframe is None:
+                return
+            with self._lock:
+                buffer = self._buffer(symbol, timeframe)
+            for item in message.get("data", []):
+                buffer.update([
+                    int(item["start"]),
+                    float(item["open"]),
+                    float(item["high"]),
+                    float(item["low"]),
+                    float(item["close"]),
+                    float(item["volume"]),
+                ])
+
+        elif topic.startswith("tickers."):
+            symbol = topic.split(".", 1)[1]
+            data = message.get("data", {})
+            if message.get("type") == "snapshot":
+                self._tickers[symbol] = dict(data)
+            else:
+                # delta приходит только с изменившимися полями
+                self._tickers.setdefault(symbol, {}).update(data)
+            self._ticker_times[symbol] = time.monotonic()
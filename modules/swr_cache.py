@@ -0,0 +1,134 @@
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Hashable
+
+import pandas as pd
+
+from modules.singleflight import get_single_flight
+
+
+# Фоновые обновления устаревших записей всех кешей
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr-refresh")
+
+
+def _copy_value(value):
+    """
+    Копия значения из кеша: вызывающий код может менять DataFrame
+    и словари, не портя закешированный экземпляр.
+    """
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+class SWRCache:
+    """
+    Кеш stale-while-revalidate для функций загрузки данных.
+
+      - возраст записи < ttl — отдаётся как есть;
+      - ttl <= возраст < ttl + grace — отдаётся сразу, а запрос к бирже
+        выполняется в фоне; следующий вызов получит свежие данные;
+      - старше или нет записи — вызов ждёт запрос (как обычный промах).
+
+    Размер ограничен maxsize, вытесняются давно не запрошенные ключи.
+    Если фоновое обновление упало, остаётся прежнее значение.
+    Промахи и обновления идут через общий SingleFlight: одинаковые
+    одновременные запросы из разных сессий склеиваются. coalesce=False —
+    для функций, которые уже склеиваются ниже (запросы BybitHttpClient).
+    """
+
+    def __init__(self, func: Callable, ttl: float, grace: float, maxsize: int = 128, coalesce: bool = True):
+        self.func = func
+        self.ttl = ttl
+        self.grace = grace
+        self.maxsize = maxsize
+        self.coalesce = coalesce
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        functools.update_wrapper(self, func)
+
+    def _key(self, args: tuple, kwargs: dict) -> Hashable:
+        return (self.func.__module__, self.func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+    def _load(self, key: Hashable, args: tuple, kwargs: dict):
+        if self.coalesce:
+            value = get_single_flight().do(key, self.func, *args, **kwargs)
+        else:
+            value = self.func(*args, **kwargs)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def _refresh(self, key: Hashable, args: tuple, kwargs: dict) -> None:
+        try:
+            self._load(key, args, kwargs)
+        except Exception:
+            pass  # остаётся устаревшее значение, повторим при следующем обращении
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def __call__(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = time.monotonic() - entry[0]
+                if age >= self.ttl + self.grace:
+                    entry = None
+                elif age >= self.ttl and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    _refresh_executor.submit(self._refresh, key, args, kwargs)
+
+        if entry is not None:
+            get_single_flight().record_hit()
+            return _copy_value(entry[1])
+        return _copy_value(self._load(key, args, kwargs))
+
+    def age(self, *args, **kwargs) -> float | None:
+        """
+        Сколько секунд назад получены данные для этих аргументов
+        (None, если их нет в кеше).
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(args, kwargs))
+        if entry is None:
+            return None
+        return time.monotonic() - entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def swr_cache(ttl: float, grace: float, maxsize: int = 128, coalesce: bool = True) -> Callable[[Callable], SWRCache]:
+    """
+    Декоратор: @swr_cache(ttl=60, grace=240) вместо @st.cache_data(ttl=60).
+    Аргументы функции должны быть хешируемыми.
+    """
+    def decorator(func: Callable) -> SWRCache:
+        return SWRCache(func, ttl=ttl, grace=grace, maxsize=maxsize, coalesce=coalesce)
+    return decorator
+
+
+def format_age(age: float | None) -> str:
+    """
+    Подпись для интерфейса: «данные получены 12 с назад». None —
+    данных нет: их ещё не загружали или загрузка не удалась.
+    """
+    if age is None:
+        return "нет данных (загрузка не удалась)"
+    if age < 1:
+        return "данные только что получены"
+    if age < 60:
+        return f"данные получены {age:.0f} с назад"
+    return f"данные получены {age / 60:.0f} мин назад"
@@ -0,0 +1,59 @@
+# flake8: noqa: E501
+import pandas as pd
+import streamlit as st
+
+from modules.dataset import available_symbols
+from modules.scanner import scan_datasets
+
+st.set_page_config(page_title="Сканер точек роста", layout="wide")
+st.title("Точки роста по всем скачанным монетам")
+
+st.sidebar.header("Параметры роста цены")
+window_size = st.sidebar.number_input(
+    "Кол-во свечей SMA | (За сколько минут)", min_value=1, value=1440, step=1,
+    help="1 день = 1440 минут, 1 неделя = 10080 минутам, 1 месяц = ~43200 минут"
+)
+sma_threshold_pct = st.sidebar.number_input(
+    "Превышение SMA (%) | (На сколько выросло)", min_value=1, value=30, step=1
+)
+
+symbols = available_symbols()
+st.write(f"Скачано монет: {len(symbols)}")
+if not symbols:
+    st.markdown("👉 [Скачать данные](/Download_data)")
+    st.stop()
+
+
+def results_table(results: list[dict]) -> pd.DataFrame:
+    df = pd.DataFrame(results, columns=["symbol", "points", "max_excess_pct", "last_point", "candles"])
+    df["last_point"] = pd.to_datetime(df["last_point"], unit="ms")
+    df = df.sort_values(["max_excess_pct", "points"], ascending=False, na_position="last")
+    df["symbol"] = df["symbol"].apply(lambda s: f"/Entry_point?symbol={s}")
+    return df.reset_index(drop=True)
+
+
+if st.button("Сканировать"):
+    progress_bar = st.progress(0)
+    table = st.empty()
+    results, errors = [], []
+
+    for i, summary in enumerate(scan_datasets(window_size, sma_threshold_pct, symbols=symbols), start=1):
+        if "error" in summary:
+            errors.append(summary)
+        else:
+            results.append(summary)
+        progress_bar.progress(i / len(symbols))
+        table.dataframe(
+            results_table(results),
+            column_config={
+                "symbol": st.column_config.LinkColumn("Монета", display_text=r"symbol=(.*)"),
+                "points": "Точек роста",
+                "max_excess_pct": st.column_config.NumberColumn("Макс. превышение SMA (%)", format="%.2f"),
+                "last_point": "Последняя точка",
+                "candles": "Свечей",
+            },
+            use_container_width=True,
+        )
+
+    for summary in errors:
+        st.warning(f"{summary['symbol']}: {summary['error']}")
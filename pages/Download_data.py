@@ -1,8 +1,14 @@
-import ccxt
+import asyncio
 import pandas as pd
-import time
 from datetime import datetime, timedelta
+from pathlib import Path
 import streamlit as st
+from ccxt.async_support import bybit as AsyncBybit
+
+from modules.dataset import dataset_path, read_meta, scan_gaps
+from modules.downloader import backfill_gaps, download_ohlcv_to_dataset
+from modules.pyramid import build_pyramid
+from modules.resample import TIMEFRAME_MS
 
 
 def fetch_ohlcv_to_file(
@@ -10,10 +16,11 @@ def fetch_ohlcv_to_file(
     timeframe: str,
     start_time: datetime,
     end_time: datetime,
-    save_path: str = "ohlcv_data.csv",
+    save_path: str = "datasets/ohlcv_data/1m",
     limit: int = 1000,
-    show_progress: bool = True
-) -> pd.DataFrame:
+    show_progress: bool = True,
+    concurrency: int = 8,
+) -> dict:
     """
     Parameters
     ----------
@@ -26,25 +33,32 @@ def fetch_ohlcv_to_file(
     end_time : datetime
         End of the time range.
     save_path : str
-        Where to save the .csv file.
+        Dataset directory (see modules.dataset). Batches are appended as
+        they arrive; a rerun resumes from the checkpoint in meta.json.
     limit : int
         Max records per request (default=1000).
     show_progress : bool
         If True, show progress in Streamlit.
+    concurrency : int
+        Parallel requests; the total rate is capped by a shared
+        token bucket at the exchange's rate limit.
 
     Returns
     -------
-    pd.DataFrame
-        The combined OHLCV data.
+    dict
+        Download statistics: rows in the file, first/last timestamp,
+        requests, candles fetched in this run, candles/s.
     """
-    exchange = ccxt.bybit()
+    exchange = AsyncBybit()
+    # Частоту ограничивает общий TokenBucket, встроенный throttle ccxt
+    # выстроил бы параллельные запросы в очередь
+    exchange.enableRateLimit = False
     since = int(start_time.timestamp() * 1000)
     end_ts = int(end_time.timestamp() * 1000)
 
-    all_data = []
-    total_requests = 0
-    total_minutes = (end_ts - since) // 60000
-    total_batches = (total_minutes // limit) + 1
+    step = TIMEFRAME_MS[timeframe]
+    total_batches = max(-(-(end_ts - since) // (step * limit)), 1)
+    batches_done = 0
 
     if show_progress:
         progress_bar = st.progress(0)
@@ -53,56 +67,103 @@ def fetch_ohlcv_to_file(
     print(f"\nStart fetching {symbol} {timeframe} candles...")
     print(f"From: {start_time} To: {end_time}\n")
 
-    while since < end_ts:
-        try:
-            candles = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
-        except Exception as e:
-            msg = f"[ERROR] {e}. Retrying in 5 seconds..."
-            print(msg)
-            if show_progress:
-                log_area.warning(msg)
-            time.sleep(5)
-            continue
-
-        if not candles:
-            break
-
-        all_data.extend(candles)
-        total_requests += 1
-
-        batch_start = datetime.fromtimestamp(candles[0][0] / 1000)
-        batch_end = datetime.fromtimestamp(candles[-1][0] / 1000)
-        msg = f"[{total_requests:03}] {len(candles)} rows | {batch_start} → {batch_end}"
+    def on_batch(candles, stats):
+        nonlocal batches_done
+        batches_done += 1
+        if candles:
+            batch_start = datetime.fromtimestamp(candles[0][0] / 1000)
+            batch_end = datetime.fromtimestamp(candles[-1][0] / 1000)
+            msg = f"[{batches_done:03}] {len(candles)} rows | {batch_start} → {batch_end} | {stats['candles_per_s']:.0f} candles/s"
+        else:
+            msg = f"[{batches_done:03}] 0 rows"
         print(msg)
         if show_progress:
             log_area.text(msg)
-            progress_bar.progress(min(total_requests / total_batches, 1.0))
+            progress_bar.progress(min(batches_done / total_batches, 1.0))
 
-        since = candles[-1][0] + 1
-        time.sleep(exchange.rateLimit / 1000.0)
+    async def download():
+        try:
+            return await download_ohlcv_to_dataset(
+                exchange, symbol, timeframe, since, end_ts, Path(save_path),
+                limit=limit, concurrency=concurrency, on_batch=on_batch,
+            )
+        finally:
+            await exchange.close()
+
+    try:
+        stats = asyncio.run(download())
+    except Exception as e:
+        msg = f"[ERROR] {e}. Saved data is kept, run the download again to resume."
+        print(msg)
+        if show_progress:
+            st.error(msg)
+        return {}
 
-    if not all_data:
+    if not stats["rows"]:
         msg = "⚠️ No data was fetched."
         print(msg)
         if show_progress:
             st.warning(msg)
-        return pd.DataFrame()
-
-    df = pd.DataFrame(all_data, columns=["timestamp", "open", "high", "low", "close", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-    df = df.drop_duplicates("timestamp").sort_values("timestamp")
-    df.to_csv(save_path, index=False)
-
-    summary = f"✅ Done. {len(df)} rows saved to: {save_path}"
+        return stats
+
+    first = pd.to_datetime(stats["first_timestamp"], unit="ms")
+    last = pd.to_datetime(stats["last_timestamp"], unit="ms")
+    summary = f"✅ Done. {stats['rows']} rows saved to: {save_path}"
+    if stats["resumed"]:
+        summary += f" (resumed, {stats['candles']} new)"
+    throughput = (
+        f"{stats['requests']} requests in {stats['seconds']:.1f} s, "
+        f"{stats['candles_per_s']:.0f} candles/s"
+    )
     print(summary)
-    print(f"Start: {df['timestamp'].iloc[0]}, End: {df['timestamp'].iloc[-1]}")
+    print(throughput)
+    print(f"Start: {first}, End: {last}")
+
+    # Старшие таймфреймы для обзорных графиков
+    if timeframe == "1m":
+        levels = build_pyramid(Path(save_path))
+        print(f"Pyramid: {levels}")
 
     if show_progress:
         progress_bar.progress(1.0)
         st.success(summary)
-        st.write(f"📅 Start: {df['timestamp'].iloc[0]} — End: {df['timestamp'].iloc[-1]}")
+        st.write(f"⚡ {throughput}")
+        st.write(f"📅 Start: {first} — End: {last}")
+
+    return stats
 
-    return df
+
+def backfill_dataset(symbol: str, save_path, concurrency: int = 8) -> dict:
+    """
+    Догружает только пропущенные свечи набора данных и показывает итог.
+    """
+    exchange = AsyncBybit()
+    exchange.enableRateLimit = False
+
+    async def backfill():
+        try:
+            return await backfill_gaps(exchange, symbol, Path(save_path), concurrency=concurrency)
+        finally:
+            await exchange.close()
+
+    with st.spinner("Догрузка пропусков..."):
+        stats = asyncio.run(backfill())
+
+    if not stats["gaps"]:
+        st.success("Пропусков нет.")
+        return stats
+
+    msg = (
+        f"✅ Пропусков: {stats['gaps']}, догружено {stats['filled']} из {stats['missing']} свечей "
+        f"за {stats['seconds']:.1f} s ({stats['requests']} requests)"
+    )
+    if stats["unfillable"]:
+        msg += f". Без данных на бирже: {stats['unfillable']}"
+    if stats["filled"] and read_meta(save_path)["timeframe"] == "1m":
+        build_pyramid(Path(save_path))
+    print(msg)
+    st.success(msg)
+    return stats
 
 
 try:
@@ -113,6 +174,7 @@ except KeyError:
 
 timeframe = '1m'
 days = st.number_input('За сколько дней скачать данные?', min_value=1, value=365, step=1)
+concurrency = st.number_input('Параллельных запросов', min_value=1, max_value=32, value=8, step=1)
 
 start = datetime.now() - timedelta(days=days)
 end = datetime.now()
@@ -123,6 +185,15 @@ if st.button("Start Download"):
         timeframe=timeframe,
         start_time=start,
         end_time=end,
-        save_path=f"datasets/{symbol.replace('/', '')}.csv",
-        show_progress=True
+        save_path=dataset_path(symbol, timeframe),
+        show_progress=True,
+        concurrency=concurrency,
     )
+
+save_path = dataset_path(symbol, timeframe)
+if read_meta(save_path) is not None:
+    gaps = scan_gaps(save_path)
+    missing = int(((gaps[:, 1] - gaps[:, 0]) // TIMEFRAME_MS[timeframe]).sum())
+    st.caption(f"В сохранённых данных пропусков: {len(gaps)} ({missing} свечей)")
+    if len(gaps) and st.button("Догрузить пропуски"):
+        backfill_dataset(symbol, save_path, concurrency=concurrency)
@@ -1,34 +1,27 @@
-import os
 import pandas as pd
 import streamlit as st
 from modules.Indicators import Chart, CandlestickIndicator
+from modules.anomaly_index import load_growth_points
+from modules.dataset import DATASETS_DIR, available_symbols, dataset_path, dataset_snapshot, load_symbol_frame
+from modules.pyramid import build_pyramid, pyramid_window
 
 st.set_page_config(page_title="Точка входа", layout="wide")
 
 
-def get_available_symbols(dataset_dir="datasets"):
-    files = os.listdir(dataset_dir)
-    symbols = [
-        f.replace(".csv", "") for f in files
-        if f.endswith(".csv")
-    ]
-    return sorted(symbols)
+def get_available_symbols(dataset_dir=DATASETS_DIR):
+    return available_symbols(dataset_dir)
 
 
-@st.cache_data
-def load_data(symbol: str):
-    filename = f"{symbol}.csv"
-    filepath = os.path.join("datasets", filename)
+@st.cache_data(max_entries=8)
+def load_data(symbol: str, snapshot: tuple | None):
+    df = load_symbol_frame(symbol)
 
-    if not os.path.exists(filepath):
-        st.error(f"Файл {filename} не найден.")
+    if df is None:
+        st.error(f"Данные {symbol} не найдены.")
         download_url = f"/Download_data?symbol={symbol}"
         st.markdown(f"👉 [Скачать данные для {symbol}]({download_url})")
         st.stop()
 
-    df = pd.read_csv(filepath, parse_dates=["timestamp"])
-    df.sort_values("timestamp", inplace=True)
-    df.reset_index(drop=True, inplace=True)
     return df
 
 
@@ -44,7 +37,8 @@ try:
 except KeyError:
     symbol = st.text_input("Символ торговой пары", "BTCUSDT")
 
-df = load_data(symbol)
+snapshot = dataset_snapshot(symbol)
+df = load_data(symbol, snapshot)
 
 
 st.sidebar.header("Параметры роста цены")
@@ -57,42 +51,23 @@ sma_threshold_pct = st.sidebar.number_input(
 )
 
 
-def find_anomalies(df: pd.DataFrame, window: int = 20, threshold_pct: float = 30) -> list:
-    df = df.copy()
-
-    # Вычисляем скользящее среднее по цене закрытия
-    df["sma"] = df["close"].rolling(window=window).mean()
-
-    anomalies = []
-
-    # Начинаем с индекса = window (до этого SMA будет NaN)
-    for i in range(window, len(df)):
-        sma = df.loc[i, "sma"]
-        close = df.loc[i, "close"]
-
-        if pd.notna(sma) and close > sma * (1 + threshold_pct / 100):
-            anomalies.append(i)
-
-    return anomalies
-
-raw_anomalies = find_anomalies(df, window_size, sma_threshold_pct)
 n_candles_context = 100
+filtered_anomalies = load_growth_points(
+    dataset_path(symbol), window_size, sma_threshold_pct, cooldown=n_candles_context
+)
+# Набор изменился, пока страница рисовалась (вставка пропусков сдвигает
+# индексы) — перерисовываем с новым снимком
+if dataset_snapshot(symbol) != snapshot:
+    st.rerun()
+filtered_anomalies = filtered_anomalies[filtered_anomalies < len(df)]
 
-filtered_anomalies = []
-last_used_index = -1
-
-for idx in raw_anomalies:
-    if idx > last_used_index + n_candles_context:
-        filtered_anomalies.append(idx)
-        last_used_index = idx
-
-anomaly_options = [df.loc[i, "timestamp"] for i in filtered_anomalies]
+anomaly_options = df["timestamp"].iloc[filtered_anomalies].tolist()
 
 if anomaly_options:
     st.write(f"Найдено точек роста: {len(anomaly_options)}")
     selected_timestamp = st.selectbox("Выберите дату: ", anomaly_options)
 
-    selected_index = df[df["timestamp"] == selected_timestamp].index[0]
+    selected_index = int(filtered_anomalies[anomaly_options.index(selected_timestamp)])
 
     start_idx = max(0, selected_index - n_candles_context)
     end_idx = min(len(df), selected_index + n_candles_context)
@@ -104,3 +79,33 @@ if anomaly_options:
     st.plotly_chart(fig, use_container_width=True)
 else:
     st.warning("Роста по параметрам не найдено. Попробуйте уменьшить порог изменения цены.")
+
+
+# --- Обзор всей истории: уровень пирамиды подбирается под видимый диапазон ---
+st.header("Вся история")
+build_pyramid(dataset_path(symbol))
+
+history_start = df["timestamp"].iloc[0].to_pydatetime()
+history_end = df["timestamp"].iloc[-1].to_pydatetime()
+if history_start < history_end:
+    visible_start, visible_end = st.slider(
+        "Видимый диапазон",
+        min_value=history_start,
+        max_value=history_end,
+        value=(history_start, history_end),
+        format="YYYY-MM-DD HH:mm",
+    )
+    max_candles = st.sidebar.number_input(
+        "Свечей на обзорном графике", min_value=100, max_value=5000, value=1000, step=100
+    )
+    level, df_visible = pyramid_window(
+        symbol,
+        int(pd.Timestamp(visible_start).value // 10**6),
+        int(pd.Timestamp(visible_end).value // 10**6),
+        max_candles=max_candles,
+    )
+    st.caption(f"Таймфрейм {level}, свечей: {len(df_visible)}")
+
+    overview = Chart(df_visible)
+    overview.add(CandlestickIndicator())
+    st.plotly_chart(overview.build(), use_container_width=True)
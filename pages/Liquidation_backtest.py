@@ -0,0 +1,98 @@
+# flake8: noqa: E501
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.backtest import liquidation_survival
+from modules.dataset import dataset_snapshot, load_symbol_frame
+from modules.risk_limits import get_tier_table
+
+st.set_page_config(page_title="Бэктест ликвидаций", layout="wide")
+st.title("Вероятность ликвидации по историческим данным")
+
+
+@st.cache_data(max_entries=8)
+def load_data(symbol: str, snapshot: tuple | None):
+    df = load_symbol_frame(symbol)
+
+    if df is None:
+        st.error(f"Данные {symbol} не найдены.")
+        download_url = f"/Download_data?symbol={symbol}"
+        st.markdown(f"👉 [Скачать данные для {symbol}]({download_url})")
+        st.stop()
+
+    return df
+
+
+try:
+    symbol = st.text_input("Символ торговой пары", st.query_params['symbol'])
+except KeyError:
+    symbol = st.text_input("Символ торговой пары", "BTCUSDT")
+
+df = load_data(symbol, dataset_snapshot(symbol))
+
+st.sidebar.header("Параметры позиции")
+position_type = st.sidebar.selectbox("Тип позиции", ["Short", "Long"], key="bt_pos_type")
+initial_deposit = st.sidebar.number_input(
+    "Начальный депозит (USDT)", min_value=1.0, value=100.0, step=1.0
+)
+support_investment = st.sidebar.number_input(
+    "Инвестиции в удержание позиции (USDT)", min_value=0.0, value=0.0, step=1.0
+)
+leverages = st.sidebar.multiselect(
+    "Плечи",
+    [1, 2, 3, 5, 10, 15, 20, 25, 50, 75, 100, 125],
+    default=[5, 10, 20, 50],
+)
+horizon = st.sidebar.number_input(
+    "Горизонт (свечей)", min_value=1, value=1440, step=1,
+    help="1 день = 1440 минут, 1 неделя = 10080 минут"
+)
+
+if not leverages:
+    st.warning("Выберите хотя бы одно плечо.")
+    st.stop()
+
+with st.spinner("Бэктест..."):
+    summary, survival = liquidation_survival(
+        df,
+        sorted(leverages),
+        position_type,
+        initial_deposit,
+        support_investment,
+        int(horizon),
+        get_tier_table(symbol),
+    )
+
+st.write(
+    f"Входов: {summary['entries'].iat[0]} | "
+    f"{df['timestamp'].iat[0]} — {df['timestamp'].iat[-1]}"
+)
+
+fig = go.Figure()
+for leverage in survival.columns:
+    fig.add_trace(
+        go.Scatter(
+            x=survival.index,
+            y=survival[leverage],
+            mode="lines",
+            name=f"x{leverage}",
+        )
+    )
+fig.update_layout(
+    height=600,
+    margin=dict(t=40, b=40),
+    xaxis_title="Свечей после входа",
+    yaxis_title="Доля неликвидированных позиций",
+    hovermode="x unified",
+)
+st.plotly_chart(fig, use_container_width=True)
+
+st.dataframe(
+    summary.rename(columns={
+        "leverage": "Плечо",
+        "entries": "Входов",
+        "liquidation_probability": "Вероятность ликвидации",
+        "median_candles_to_liquidation": "Медиана свечей до ликвидации",
+    }),
+    hide_index=True,
+)
@@ -4,17 +4,21 @@ import streamlit as st
 from modules.data_loader import (
     get_bybit_exchange,
     get_ticker,
-    get_ohlcv,
-    get_long_short_ratio,
-    get_open_interest,
-    get_funding_history,
+    get_ticker_age,
+    get_request_stats,
+    load_page_data,
 )
 from modules.Indicators import *
 
 from modules.calculations import normalize_symbol
+from modules.swr_cache import format_age
 
 from modules.indicators.stop_loss import stop_loss_settings
-from modules.indicators.posicion import posicion_settings, position_info
+from modules.indicators.posicion import (
+    posicion_settings,
+    position_info,
+    liquidation_target_settings,
+)
 
 
 # --- Page configuration ---
@@ -34,6 +38,14 @@ with st.sidebar:
     # symbol = normalize_symbol(symbol)
     current_price = get_ticker(symbol)['last']
 
+    candles_limit = st.number_input(
+        "Свечей на графике",
+        min_value=50,
+        max_value=5000,
+        value=156,
+        step=50,
+    )
+
     # --- Indicators ---
     st.header("Настройка индикаторов")
     indicator_options = [
@@ -45,7 +57,7 @@ with st.sidebar:
         "Long-Short Ratio",
         "Funding Rate",
         "Open-interest",
-        # "Аномалии объёма",
+        "Аномалии объёма",
     ]
     selected_indicators = st.multiselect(
         "Выберите индикатор", indicator_options, default=[]
@@ -63,7 +75,8 @@ with st.sidebar:
 
 
     if "Позиция" in selected_indicators:
-        position_details = posicion_settings(current_price)
+        position_details = posicion_settings(current_price, symbol)
+        liquidation_target_settings(position_details)
 
     if "SMA по объёму" in selected_indicators:
         st.subheader("Настройки SMA")
@@ -77,11 +90,18 @@ with st.sidebar:
 
     if "Аномалии объёма" in selected_indicators:
         st.subheader("Настройки аномального объема")
-        volume_multiplier = st.sidebar.slider(
-            "Множитель объёма",
+        volume_window = st.sidebar.slider(
+            "Окно объёма (свечей)",
+            min_value=10,
+            max_value=500,
+            value=100,
+            step=10
+        )
+        volume_z = st.sidebar.slider(
+            "Порог z-оценки объёма",
             min_value=1.0,
-            max_value=100.0,
-            value=2.0,
+            max_value=10.0,
+            value=3.0,
             step=0.1
         )
 
@@ -110,26 +130,39 @@ with st.sidebar:
 
 # --- Load data and charts ---
 st.header(f"{symbol} – ${current_price}")
+st.caption(f"Цена: {format_age(get_ticker_age(symbol))}")
 tabs = st.tabs(["1 день", "1 час", "15 минут", "5 минут", "1 минута"])
 timeframes = ["1d", "1h", "15m", "5m", "1m"]
-df_ohlcv_async = asyncio.run(get_ohlcv(symbol, timeframes))
+datasets = ["ohlcv"]
+if "Long-Short Ratio" in selected_indicators:
+    datasets.append("long_short_ratio")
+if "Open-interest" in selected_indicators:
+    datasets.append("open_interest")
+if "Funding Rate" in selected_indicators:
+    datasets.append("funding_rate")
 
-if "Позиция" in selected_indicators:
-    position_info(current_price=current_price, position_details=position_details)
+page_data, page_errors = asyncio.run(
+    load_page_data(symbol, timeframes, tuple(datasets), ohlcv_limit=candles_limit)
+)
+for dataset, error in page_errors.items():
+    st.warning(f"Не удалось загрузить {dataset}: {error}")
 
-if "Long-Short Ratio" in selected_indicators:
-    df_long_short_ratio_async = asyncio.run(
-        get_long_short_ratio(symbol, ["1d", "1h", "15min", "5min"])
-    )    
+with st.sidebar.expander("Запросы к бирже"):
+    st.json(get_request_stats())
 
-if "Open-interest" in selected_indicators:
-    df_open_int_async = asyncio.run(
-        get_open_interest(symbol, ["1d", "1h", "15min", "5min"])
-    )
+df_ohlcv_async = page_data["ohlcv"]
+df_long_short_ratio_async = page_data.get("long_short_ratio", {})
+df_open_int_async = page_data.get("open_interest", {})
+funding_dataframe = page_data.get("funding_rate", {})
 
-# ✅
-if "Funding Rate" in selected_indicators:
-    funding_dataframe = get_funding_history(symbol, timeframes)
+if "Позиция" in selected_indicators:
+    position_info(
+        current_price=current_price,
+        position_details=position_details,
+        df_ohlcv=df_ohlcv_async.get("1m"),
+        symbol=symbol,
+        timeframe="1m",
+    )
 
 
 with st.spinner("Загрузка графиков..."):
@@ -153,6 +186,9 @@ with st.spinner("Загрузка графиков..."):
             if "SMA по объёму" in selected_indicators:
                 chart.add(SMAVolumeIndicator(period=sma_period))
 
+            if "Аномалии объёма" in selected_indicators:
+                chart.add(VolumeAnomalyIndicator(window=volume_window, z=volume_z))
+
             # ✅
             if "Позиция" in selected_indicators:
                 chart.add(PositionIndicator(position_details["entry_price"], position_details["liquidation_price"]))
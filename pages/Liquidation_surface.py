@@ -0,0 +1,117 @@
+# flake8: noqa: E501
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.calculations import TierTable, calculate_liquidation_batch
+from modules.data_loader import get_ticker
+from modules.risk_limits import get_tier_table
+
+
+st.set_page_config(page_title="Карта ликвидации", layout="wide")
+st.title("Расстояние до ликвидации: плечо × инвестиции в удержание")
+
+# Полная сетка считается один раз, слайдеры только выбирают её часть
+LEVERAGE_GRID = np.arange(1, 126)
+SUPPORT_GRID = np.linspace(0, 10_000, 801)
+
+
+def price_bucket(price: float, digits: int = 4) -> float:
+    """
+    Округляет цену до digits значащих цифр, чтобы мелкие колебания
+    тикера не сбрасывали кеш поверхности.
+    """
+    return float(f"{price:.{digits}g}")
+
+
+@st.cache_data(max_entries=32)
+def liquidation_surface(
+    symbol: str,
+    price: float,
+    tiers: TierTable,
+    position_type: str,
+    initial_deposit: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Цена и расстояние до ликвидации на всей сетке плечо × инвестиции
+    одним векторным вызовом. Кешируется по (symbol, ценовая корзина,
+    таблица уровней риска, тип позиции, депозит).
+    """
+    liq_price, liq_dist = calculate_liquidation_batch(
+        price,
+        LEVERAGE_GRID[:, None],
+        position_type,
+        initial_deposit,
+        SUPPORT_GRID[None, :],
+        tiers,
+    )
+    # Ликвидация по другую сторону от входа — позиция не открывается
+    wrong_side = (liq_price >= price) if position_type == "Long" else (liq_price <= price)
+    liq_dist = np.where(wrong_side, np.nan, liq_dist)
+    return liq_price, liq_dist
+
+
+with st.sidebar:
+    st.header("Торговая пара")
+    try:
+        symbol = st.text_input("Символ торговой пары", st.query_params['symbol'])
+    except KeyError:
+        symbol = st.text_input("Символ торговой пары", "BTCUSDT")
+
+    current_price = get_ticker(symbol)['last']
+
+    st.header("Параметры позиции")
+    position_type = st.selectbox("Тип позиции", ["Short", "Long"], key="surface_pos_type")
+    initial_deposit = st.number_input(
+        "Начальный депозит (USDT)", min_value=1.0, value=100.0, step=1.0
+    )
+
+    st.header("Область графика")
+    lev_from, lev_to = st.slider(
+        "Плечо",
+        min_value=int(LEVERAGE_GRID[0]),
+        max_value=int(LEVERAGE_GRID[-1]),
+        value=(int(LEVERAGE_GRID[0]), int(LEVERAGE_GRID[-1])),
+    )
+    sup_from, sup_to = st.slider(
+        "Инвестиции в удержание (USDT)",
+        min_value=float(SUPPORT_GRID[0]),
+        max_value=float(SUPPORT_GRID[-1]),
+        value=(float(SUPPORT_GRID[0]), float(SUPPORT_GRID[-1])),
+        step=float(SUPPORT_GRID[1] - SUPPORT_GRID[0]),
+    )
+
+entry_price = price_bucket(current_price)
+tiers = get_tier_table(symbol)
+liq_price, liq_dist = liquidation_surface(
+    symbol, entry_price, tiers, position_type, initial_deposit
+)
+
+lev_mask = (LEVERAGE_GRID >= lev_from) & (LEVERAGE_GRID <= lev_to)
+sup_mask = (SUPPORT_GRID >= sup_from) & (SUPPORT_GRID <= sup_to)
+
+st.header(f"{symbol} – ${current_price} (расчёт от ${entry_price})")
+
+fig = go.Figure(
+    go.Heatmap(
+        x=SUPPORT_GRID[sup_mask],
+        y=LEVERAGE_GRID[lev_mask],
+        z=liq_dist[np.ix_(lev_mask, sup_mask)],
+        customdata=liq_price[np.ix_(lev_mask, sup_mask)],
+        colorscale="RdYlGn",
+        colorbar=dict(title="До ликв. (%)"),
+        hovertemplate=(
+            "Плечо: x%{y}<br>"
+            "Инвестиции: $%{x:.2f}<br>"
+            "До ликвидации: %{z:.2f}%<br>"
+            "Цена ликвидации: $%{customdata}<extra></extra>"
+        ),
+    )
+)
+fig.update_layout(
+    height=800,
+    margin=dict(t=40, b=40),
+    xaxis_title="Инвестиции в удержание (USDT)",
+    yaxis_title="Плечо",
+)
+st.plotly_chart(fig, use_container_width=True)
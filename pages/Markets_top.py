@@ -4,6 +4,7 @@ import pandas as pd
 
 from modules.data_loader import get_bybit_exchange
 from modules.data_loader import get_tickers
+from modules.swr_cache import format_age
 
 
 st.set_page_config(page_title="Рост монет", layout="wide")
@@ -150,3 +151,5 @@ if display_mode == "Карточки":
     show_top_in_cards()
 else:
     show_top_in_table()
+
+st.sidebar.caption(f"Тикеры: {format_age(get_tickers.age())}")
@@ -0,0 +1,79 @@
+"""
+Потоковые детекторы: совпадение с векторным поиском, перенос состояния
+через границы кусков и проверка незакрытой свечи без изменения состояния.
+"""
+import numpy as np
+import pytest
+
+from modules.benchmarks import synthetic_ohlcv
+from modules.candle_store import OHLCV_COLUMNS
+from modules.dataset import DatasetWriter
+from modules.detection import sma_breakouts
+from modules.detectors import ATRExpansion, DrawdownFromMax, SMABreakout, VolumeZScore, scan_dataset
+
+
+DETECTORS = {
+    "sma": lambda: SMABreakout(120, 0.5),
+    "volume": lambda: VolumeZScore(50, 1.5),
+    "drawdown": lambda: DrawdownFromMax(1.0, window=300),
+    "drawdown_all_time": lambda: DrawdownFromMax(5.0),
+    "atr": lambda: ATRExpansion(5, 50, 1.2),
+}
+
+
+@pytest.fixture(scope="module")
+def columns():
+    df = synthetic_ohlcv(20_000, seed=7)
+    df["volume"] = np.random.default_rng(7).lognormal(0, 1, len(df))
+    return {name: df[name].to_numpy() for name in OHLCV_COLUMNS}
+
+
+def chunks(columns, sizes):
+    start = 0
+    for size in sizes:
+        yield start, {name: values[start:start + size] for name, values in columns.items()}
+        start += size
+
+
+@pytest.mark.parametrize("window, threshold_pct", [(1440, 1.0), (60, 0.5), (5, 0.1)])
+def test_sma_breakout_matches_vectorized(columns, window, threshold_pct):
+    expected = sma_breakouts(columns["close"], window, threshold_pct)
+    result = SMABreakout(window, threshold_pct).scan(columns)
+    assert len(expected)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("name", DETECTORS)
+def test_state_carries_over_chunk_boundaries(columns, name):
+    expected = DETECTORS[name]().scan(columns)
+    assert len(expected)
+
+    detector = DETECTORS[name]()
+    sizes = [1, 49, 50, 997, 3, 5_000, 13_900]
+    assert sum(sizes) == len(columns["close"])
+    result = np.concatenate([detector.scan(chunk, offset) for offset, chunk in chunks(columns, sizes)])
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("name", DETECTORS)
+def test_open_candle_check_does_not_change_state(columns, name):
+    live, reference = DETECTORS[name](), DETECTORS[name]()
+    for i, candle in enumerate(zip(*(columns[n][:3_000].tolist() for n in OHLCV_COLUMNS))):
+        # Незакрытая свеча проверяется несколько раз, пока не закроется
+        peeked = live.update(candle, closed=False)
+        assert live.update(candle, closed=False) == peeked
+        assert live.update(candle) == reference.update(candle) == peeked, i
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_scan_dataset_in_chunks(tmp_path, columns, compression):
+    writer = DatasetWriter(tmp_path / "1m", "1m", compression=compression)
+    writer.append(np.column_stack([columns[name] for name in OHLCV_COLUMNS]))
+
+    detectors = [SMABreakout(120, 0.5), SMABreakout(30, 0.5), VolumeZScore(50, 1.5)]
+    results = scan_dataset(tmp_path / "1m", detectors, chunk_rows=1_234)
+
+    # Два детектора одного класса с разными параметрами не перетирают друг друга
+    np.testing.assert_array_equal(results[0], sma_breakouts(columns["close"], 120, 0.5))
+    np.testing.assert_array_equal(results[1], sma_breakouts(columns["close"], 30, 0.5))
+    np.testing.assert_array_equal(results[2], VolumeZScore(50, 1.5).scan(columns))
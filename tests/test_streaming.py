@@ -0,0 +1,210 @@
+# flake8: noqa: E501
+"""
+MarketStream против локального сервера, который проигрывает записанные
+сообщения Bybit v5. Запуск: python -m pytest
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from modules.streaming import CandleBuffer, MarketStream
+
+
+SYMBOL = "BTCUSDT"
+MINUTE = 60_000
+START = 1_700_000_000_000
+
+
+def kline_message(index: int, close: float, confirm: bool = True) -> dict:
+    return {
+        "topic": f"kline.1.{SYMBOL}",
+        "type": "snapshot",
+        "data": [{
+            "start": START + index * MINUTE,
+            "end": START + (index + 1) * MINUTE - 1,
+            "interval": "1",
+            "open": str(close - 1),
+            "high": str(close + 1),
+            "low": str(close - 2),
+            "close": str(close),
+            "volume": "10",
+            "confirm": confirm,
+        }],
+    }
+
+
+class ReplayServer:
+    """
+    Локальная замена WebSocket Bybit: на каждую подписку отвечает
+    подтверждением и проигрывает записанные сообщения подписанных топиков.
+    drop() рвёт текущие соединения, как при обрыве сети.
+    """
+
+    def __init__(self, messages: list[dict]):
+        self.messages = messages
+        self.connections = 0
+        self._connections = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.url = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(timeout=5)
+
+    async def _start(self) -> str:
+        self._server = await serve(self._handler, "127.0.0.1", 0)
+        port = next(iter(self._server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def _handler(self, ws):
+        self.connections += 1
+        self._connections.add(ws)
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                if request.get("op") == "ping":
+                    await ws.send(json.dumps({"op": "pong", "success": True}))
+                    continue
+                if request.get("op") != "subscribe":
+                    continue
+                topics = set(request.get("args", []))
+                await ws.send(json.dumps({"op": "subscribe", "success": True}))
+                for message in self.messages:
+                    if message.get("topic") in topics:
+                        await ws.send(json.dumps(message))
+        except ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(ws)
+
+    def drop(self) -> None:
+        async def close_all():
+            for ws in list(self._connections):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(timeout=5)
+
+    def close(self) -> None:
+        async def stop():
+            self._server.close()
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(stop(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("условие не выполнилось за отведённое время")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def replay():
+    servers = []
+
+    def start(messages):
+        server = ReplayServer(messages)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_candle_buffer_replaces_open_candle_and_keeps_streamed_on_seed():
+    buffer = CandleBuffer(maxlen=10)
+    buffer.update([START + MINUTE, 1, 1, 1, 1, 1])
+    buffer.update([START + MINUTE, 2, 2, 2, 2, 2])
+    buffer.seed([[START, 0, 0, 0, 0, 0], [START + MINUTE, 9, 9, 9, 9, 9]])
+
+    df = buffer.to_frame()
+    assert len(df) == 2
+    assert df["close"].tolist() == [0, 2]
+
+
+def test_replayed_klines_reach_buffer(replay):
+    messages = [kline_message(i, 100 + i) for i in range(5)]
+    messages.append(kline_message(4, 200, confirm=False))  # обновление незакрытой свечи
+    server = replay(messages)
+
+    stream = MarketStream(url=server.url, buffer_size=100)
+    try:
+        stream.subscribe(SYMBOL, ["1m"])
+        stream.seed(SYMBOL, "1m", [])
+        wait_for(lambda: (df := stream.candles(SYMBOL, "1m", 5)) is not None and df["close"].iloc[-1] == 200)
+
+        df = stream.candles(SYMBOL, "1m", 5)
+        assert df["close"].tolist() == [100, 101, 102, 103, 200]
+        assert df["timestamp"].iloc[0] == pd.Timestamp(START, unit="ms")
+    finally:
+        stream.close()
+
+
+def test_reconnect_invalidates_and_reseeds_buffers(replay):
+    server = replay([kline_message(i, 100 + i) for i in range(3)])
+    reseeded = []
+
+    stream = MarketStream(url=server.url, buffer_size=100, reconnect_delay=0.05)
+
+    def on_reconnect(keys):
+        reseeded.extend(keys)
+        stream.seed(SYMBOL, "1m", [[START + i * MINUTE, 1, 1, 1, 50 + i, 1] for i in range(6)])
+
+    stream.on_reconnect = on_reconnect
+    try:
+        stream.subscribe(SYMBOL, ["1m"])
+        stream.seed(SYMBOL, "1m", [])
+        wait_for(lambda: stream.candles(SYMBOL, "1m", 3) is not None)
+
+        # Свечи 3–5 закрылись без соединения: в поток они уже не придут
+        server.drop()
+        wait_for(lambda: server.connections == 2 and reseeded)
+
+        assert reseeded == [(SYMBOL, "1m")]
+        df = stream.candles(SYMBOL, "1m", 6)
+        assert df is not None
+        assert df["timestamp"].diff().dropna().nunique() == 1
+        # История из REST заменяет всё, что буфер успел получить до обрыва
+        assert df["close"].tolist() == [50, 51, 52, 53, 54, 55]
+    finally:
+        stream.close()
+
+
+def ticker_message(price: float) -> dict:
+    return {
+        "topic": f"tickers.{SYMBOL}",
+        "type": "snapshot",
+        "data": {"symbol": SYMBOL, "lastPrice": str(price), "price24hPcnt": "0.01"},
+    }
+
+
+def test_disconnect_stops_serving_frozen_data(replay):
+    server = replay([ticker_message(100), *(kline_message(i, 100 + i) for i in range(3))])
+
+    # Переподключение не успеет случиться, пока идут проверки
+    stream = MarketStream(url=server.url, buffer_size=100, reconnect_delay=60)
+    try:
+        stream.subscribe(SYMBOL, ["1m"])
+        stream.seed(SYMBOL, "1m", [])
+        wait_for(lambda: stream.ticker(SYMBOL) is not None and stream.candles(SYMBOL, "1m", 3) is not None)
+        assert 0 <= stream.ticker_age(SYMBOL) < 5
+        assert 0 <= stream.candles_age(SYMBOL, "1m") < 5
+
+        server.drop()
+        wait_for(lambda: stream.ticker(SYMBOL) is None)
+        assert stream.ticker_age(SYMBOL) is None
+        assert stream.candles(SYMBOL, "1m", 3) is None
+        assert stream.candles_age(SYMBOL, "1m") is None
+
+        # Заполнение без соединения не возвращает застывший буфер
+        stream.seed(SYMBOL, "1m", [[START + i * MINUTE, 1, 1, 1, 1, 1] for i in range(3)])
+        assert stream.candles(SYMBOL, "1m", 3) is None
+    finally:
+        stream.close()